@@ -1,29 +1,80 @@
-from flask import Flask, request, render_template, jsonify
-from pshield import PromptShield
-import json
+from flask import Flask, Response, request, render_template, jsonify
+from pshield import PromptShield, load_pipeline
+import threading
 
 app = Flask(__name__)
 
+# The spaCy pipeline is loaded once per worker, in the background, so the
+# worker can answer the readiness probe while the model is still loading.
+nlp = None
+# One warm instance for every request; each request works on a session view
+shield = None
+nlp_ready = threading.Event()
+# Set, along with nlp_ready, if loading failed (missing model, out of memory):
+# requests then get a 503 instead of waiting forever
+nlp_error = None
+
+
+def load_nlp():
+    global nlp, shield, nlp_error
+    try:
+        # Only the components the NER rules read (see pshield.load_pipeline)
+        nlp = load_pipeline()
+        shield = PromptShield(nlp=nlp)
+        # Run one document through the pipeline so the first real request
+        # does not pay for lazy initialisation
+        shield.for_session(None).protect("John sent $50 to jane@example.com", translate=False)
+        # Call, stage and per-rule timings for /metrics, from the first real request on
+        shield.instrument()
+    except Exception as e:
+        app.logger.exception("Loading the spaCy pipeline failed")
+        nlp_error = f"{type(e).__name__}: {e}"
+    nlp_ready.set()
+
+
+threading.Thread(target=load_nlp, daemon=True).start()
+
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     original_text = ""
     anonimized_text = ""
     mapping = {}
+    spans = []
     
     if request.method == 'POST':
-        # Create a new instance for each request to avoid cache conflicts
-        pshield = PromptShield()
+        nlp_ready.wait()
+        if nlp_error is not None:
+            return f"The spaCy pipeline failed to load: {nlp_error}", 503
+        # A fresh, unstored session: every form submission starts from [TYPE_1]
+        pshield = shield.for_session(None)
         original_text = request.form.get('user_text', '')
-        anonimized_text = pshield.protect(original_text)
+        anonimized_text, spans = pshield.protect_spans(original_text)
         mapping = pshield.get_mapping()
     
     return render_template(
         "prompt_input_form.html",
         original_text=original_text,
         anonimized_text=anonimized_text,
-        mapping=json.dumps(mapping)
+        mapping=mapping,
+        spans=[span._asdict() for span in spans]
     )
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: protect latency histograms per call and stage, time and matches per rule"""
+    body = shield.instrumentation.prometheus() if nlp_ready.is_set() and nlp_error is None else ''
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the spaCy pipeline is loaded and warmed, 503 before or if loading failed"""
+    if not nlp_ready.is_set():
+        return jsonify({'ready': False}), 503
+    if nlp_error is not None:
+        return jsonify({'ready': False, 'error': nlp_error}), 503
+    return jsonify({'ready': True})
+
 @app.route('/restore', methods=['POST'])
 def restore():
     """API endpoint to restore a specific placeholder"""
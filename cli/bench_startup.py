@@ -0,0 +1,51 @@
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+CLI = Path(__file__).with_name('cli.py')
+SAMPLE = "John sent $1,000 to jane@example.com"
+
+def measure(engine, runs):
+    """Wall time of complete CLI runs, each in a fresh interpreter"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(CLI), '--no-logo', '--engine', engine, '-t', SAMPLE],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure pshield CLI cold-start latency per engine')
+    parser.add_argument('--engine', choices=['spacy', 'regex'], action='append',
+                        help='Engine to measure (repeatable, default: all)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per engine (default: 5)')
+    parser.add_argument('--max-seconds', type=float,
+                        help='Exit with status 1 if any median exceeds this many seconds')
+    args = parser.parse_args()
+
+    failed = False
+    for engine in args.engine or ['regex', 'spacy']:
+        timings = measure(engine, args.runs)
+        median = statistics.median(timings)
+        print(json.dumps({
+            'engine': engine,
+            'runs': args.runs,
+            'median_s': round(median, 4),
+            'min_s': round(min(timings), 4),
+            'max_s': round(max(timings), 4),
+        }))
+        if args.max_seconds is not None and median > args.max_seconds:
+            print(f"Error: {engine} median {median:.3f}s exceeds {args.max_seconds}s", file=sys.stderr)
+            failed = True
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
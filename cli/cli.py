@@ -15,6 +15,11 @@ LOGO = r"""
 ╚═══════════════════════════════════════════╝
 """
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def entity_list(value):
+    return [entity.strip() for entity in value.split(',') if entity.strip()]
+
 def main():
     parser = argparse.ArgumentParser(
         description='Anonymize sensitive information in text prompts/documents',
@@ -27,6 +32,13 @@ def main():
     input_group.add_argument('-t', '--text', help='Input text string')
     parser.add_argument('-o', '--output', help='Output file (default: stdout)')
     parser.add_argument('--no-logo', action='store_true', help='Suppress logo display')
+    parser.add_argument('--engine', choices=['spacy', 'regex'], default='spacy',
+                        help='Detection engine: spacy (default, adds NER) or regex (patterns only, starts instantly)')
+    parser.add_argument('--entities', type=entity_list,
+                        help='Only detect these entity types, comma-separated (e.g. email,card)')
+    parser.add_argument('--exclude', type=entity_list, help='Entity types not to detect, comma-separated')
+    parser.add_argument('--stream', action='store_true',
+                        help='Process the input in bounded windows instead of reading it whole (for large files)')
 
     args = parser.parse_args()
 
@@ -34,7 +46,15 @@ def main():
         print(LOGO)
 
     try:
-        anonymizer = PromptShield()
+        # Don't load spaCy at all when no selected entity type needs NER
+        rules = PromptShield(engine='regex').select_rules(args.entities, args.exclude)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    engine = args.engine if any('ner' in rule for rule in rules.values()) else 'regex'
+
+    try:
+        anonymizer = PromptShield(engine=engine)
     except OSError as e:
         if "Can't find model 'en_core_web_sm'" in str(e):
             print("Error: spaCy model not found. Install it with:", file=sys.stderr)
@@ -42,6 +62,9 @@ def main():
             return 1
         raise
 
+    if args.stream:
+        return stream(anonymizer, args, parser)
+
     if args.file:
         file_path = Path(args.file)
         if not file_path.exists():
@@ -61,7 +84,7 @@ def main():
         return 1
 
     try:
-        anonymized_text = anonymizer.protect(text)
+        anonymized_text = anonymizer.protect(text, entities=args.entities, exclude=args.exclude)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -74,5 +97,39 @@ def main():
 
     return 0
 
+def stream(anonymizer, args, parser):
+    """Protects the input window by window, writing output as it is produced"""
+    if args.file:
+        file_path = Path(args.file)
+        if not file_path.exists():
+            print(f"Error: File '{args.file}' not found.", file=sys.stderr)
+            return 1
+        source = open(file_path, encoding='utf-8')
+    elif args.text:
+        source = None
+    else:
+        if sys.stdin.isatty():
+            parser.print_help()
+            return 1
+        source = sys.stdin
+
+    chunks = [args.text] if source is None else iter(lambda: source.read(STREAM_CHUNK_SIZE), '')
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for protected in anonymizer.protect_stream(chunks, entities=args.entities, exclude=args.exclude):
+            output.write(protected)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source not in (None, sys.stdin):
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    if args.output:
+        print(f"✓ Anonymized text written to '{args.output}'", file=sys.stderr)
+    return 0
+
 if __name__ == '__main__':
     sys.exit(main())
\ No newline at end of file
@@ -1,5 +1,9 @@
 // Store the mapping globally
 let currentMapping = {};
+// One session per browser profile, so re-running on an edited text only
+// re-detects what changed and keeps its placeholders
+const sessionId = localStorage.getItem('pshieldSession') || crypto.randomUUID();
+localStorage.setItem('pshieldSession', sessionId);
 
 document.getElementById('anonymize').addEventListener('click', async () => {
   const input = document.getElementById('input').value;
@@ -24,14 +28,14 @@ document.getElementById('anonymize').addEventListener('click', async () => {
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ text: input })
+      body: JSON.stringify({ text: input, session: sessionId, document: 'popup' })
     });
     
     const data = await response.json();
     currentMapping = data.mapping || {};
     
     // Make placeholders clickable
-    makeClickable(data.result);
+    makeClickable(data.result, data.spans || []);
     
     output.classList.remove('hidden');
     copyBtn.classList.remove('hidden');
@@ -45,25 +49,32 @@ document.getElementById('anonymize').addEventListener('click', async () => {
   }
 });
 
-// Make placeholders clickable
-function makeClickable(text) {
+// Make placeholders clickable, using the span offsets returned by the
+// server instead of re-scanning the text for placeholders
+function makeClickable(text, spans) {
   const output = document.getElementById('output');
-  
-  // Replace all placeholders with clickable spans
-  const placeholderPattern = /\[([A-Z_\-À-ÿ\s]+)_(\d+)\]/g;
-  let html = text.replace(placeholderPattern, function(match) {
-    return `<span class="placeholder" data-placeholder="${match}" data-state="placeholder">${match}</span>`;
-  });
-  
-  output.innerHTML = html;
-  
-  // Add click listeners to all placeholders
-  const placeholders = output.querySelectorAll('.placeholder');
-  placeholders.forEach(placeholder => {
-    placeholder.addEventListener('click', function() {
+  // Span offsets count code points, not UTF-16 units
+  const chars = Array.from(text);
+  let last = 0;
+
+  output.textContent = '';
+  for (const span of spans) {
+    output.appendChild(document.createTextNode(chars.slice(last, span.output_start).join('')));
+
+    const element = document.createElement('span');
+    element.className = 'placeholder';
+    element.dataset.placeholder = span.placeholder;
+    element.dataset.original = span.original;
+    element.dataset.state = 'placeholder';
+    element.textContent = span.placeholder;
+    element.addEventListener('click', function() {
       togglePlaceholder(this);
     });
-  });
+    output.appendChild(element);
+
+    last = span.output_end;
+  }
+  output.appendChild(document.createTextNode(chars.slice(last).join('')));
 }
 
 // Toggle between placeholder and original value
@@ -73,9 +84,9 @@ function togglePlaceholder(element) {
   
   if (currentState === 'placeholder') {
     // Restore to original value
-    if (!currentMapping[placeholder]) return;
-    
-    const originalValue = currentMapping[placeholder];
+    const originalValue = element.dataset.original || currentMapping[placeholder];
+    if (!originalValue) return;
+
     element.textContent = originalValue;
     element.classList.add('restored');
     element.dataset.state = 'restored';
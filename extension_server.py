@@ -1,19 +1,95 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from pshield import PromptShield
+from pshield import PromptShield, MemoryMappingStore, load_pipeline
+import threading
 
 app = Flask(__name__)
 CORS(app)
 
+# The spaCy pipeline is loaded once per worker, in the background, so the
+# worker can answer the readiness probe while the model is still loading.
+nlp = None
+# One warm instance for every request; each request works on a session view
+shield = None
+nlp_ready = threading.Event()
+# Set, along with nlp_ready, if loading failed (missing model, out of memory):
+# requests then get a 503 instead of waiting forever
+nlp_error = None
+# Sessions, their placeholders and their documents together may use this
+# much memory before the least recently used are dropped
+MAX_SESSION_BYTES = 256 * 1024 * 1024
+
+
+def load_nlp():
+    global nlp, shield, nlp_error
+    try:
+        # Only the components the NER rules read (see pshield.load_pipeline)
+        nlp = load_pipeline()
+        shield = PromptShield(nlp=nlp, store=MemoryMappingStore(max_bytes=MAX_SESSION_BYTES))
+        # Run one document through the pipeline so the first real request
+        # does not pay for lazy initialisation
+        shield.for_session(None).protect("John sent $50 to jane@example.com", translate=False)
+        # Call, stage and per-rule timings for /metrics, from the first real request on
+        shield.instrument()
+    except Exception as e:
+        app.logger.exception("Loading the spaCy pipeline failed")
+        nlp_error = f"{type(e).__name__}: {e}"
+    nlp_ready.set()
+
+
+threading.Thread(target=load_nlp, daemon=True).start()
+
+
 @app.route('/anonymize', methods=['POST'])
 def anonymize():
-    # Create a new instance for each request to avoid cache conflicts
-    anonymizer = PromptShield()
+    nlp_ready.wait()
+    if nlp_error is not None:
+        return jsonify({'error': f"The spaCy pipeline failed to load: {nlp_error}"}), 503
     data = request.json
+    # Requests with the same "session" share placeholder numbering (the
+    # mapping returned covers the whole session); without one every request
+    # starts from [TYPE_1]. Idle and least recently used sessions are dropped.
+    anonymizer = shield.for_session(data.get('session'))
     text = data.get('text', '')
-    result = anonymizer.protect(text)
-    mapping = anonymizer.get_mapping()
-    return jsonify({'result': result, 'mapping': mapping})
+    # Concurrent requests on one session would race on placeholder numbering
+    with anonymizer.lock:
+        try:
+            if data.get('document') is not None and data.get('session') is not None:
+                # A new version of a document seen before: only the edited part is
+                # detected again. Documents are kept in (and dropped with) their session
+                document = anonymizer.document(
+                    entities=data.get('entities'), exclude=data.get('exclude'),
+                    document_id=(data['document'], str(data.get('entities')), str(data.get('exclude'))))
+                result, spans = document.update(text)
+            else:
+                # Optional lists of entity types, e.g. {"entities": ["email", "card"]}
+                result, spans = anonymizer.protect_spans(text, entities=data.get('entities'),
+                                                         exclude=data.get('exclude'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        mapping = anonymizer.get_mapping()
+        # A document's spans are a view the next update() changes
+        spans = [span._asdict() for span in spans]
+    return jsonify({
+        'result': result,
+        'mapping': mapping,
+        'spans': spans
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: protect latency histograms per call and stage, time and matches per rule"""
+    body = shield.instrumentation.prometheus() if nlp_ready.is_set() and nlp_error is None else ''
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the spaCy pipeline is loaded and warmed, 503 before or if loading failed"""
+    if not nlp_ready.is_set():
+        return jsonify({'ready': False}), 503
+    if nlp_error is not None:
+        return jsonify({'ready': False, 'error': nlp_error}), 503
+    return jsonify({'ready': True})
 
 if __name__ == '__main__':
     app.run(port=5000, debug=True)
@@ -0,0 +1,241 @@
+"""
+Asyncio server for the browser extension, with the same /anonymize contract
+as extension_server.py.
+
+protect() is CPU-bound, so requests are handed to a bounded pool of worker
+processes that each load the spaCy pipeline once at startup. The event loop
+only parses requests and waits, so one long document no longer blocks other
+users. Past --max-pending outstanding requests the server answers 429. If a
+worker dies, the pool is replaced and the server is unready until it's loaded.
+
+    python extension_server_async.py --workers 4 --max-pending 32
+"""
+import os
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from aiohttp import web
+
+from pshield import PromptShield, load_pipeline
+
+POOL = web.AppKey('pool', ProcessPoolExecutor)
+PRELOAD = web.AppKey('preload', asyncio.Task)
+READY = web.AppKey('ready', asyncio.Event)
+STATS = web.AppKey('stats', 'Stats')
+# Settings, plus the number of requests queued or running in the pool
+CONFIG = web.AppKey('config', dict)
+
+# Loaded once per worker process by init_worker()
+_nlp = None
+# Shared by the workers of one pool, see warm_up()
+_barrier = None
+
+
+def init_worker(barrier):
+    global _nlp, _barrier
+    _barrier = barrier
+    _nlp = load_pipeline()
+    # Run one document through the pipeline so the first real request
+    # does not pay for lazy initialisation
+    PromptShield(nlp=_nlp).protect("John sent $50 to jane@example.com")
+
+
+def warm_up():
+    """
+    Submitted once per worker at startup. Each call waits until all of them
+    are running, so no process can take two and every worker is started and
+    loaded once they return.
+    """
+    _barrier.wait()
+    return os.getpid()
+
+
+def anonymize_job(text, entities, exclude, submitted_at):
+    """Runs in a worker process; timing uses the wall clock, which both processes share"""
+    started_at = time.time()
+    anonymizer = PromptShield(nlp=_nlp)
+    result, spans = anonymizer.protect_spans(text, entities=entities, exclude=exclude)
+    return {
+        'result': result,
+        'mapping': anonymizer.get_mapping(),
+        'spans': [span._asdict() for span in spans],
+        'queue_ms': (started_at - submitted_at) * 1000,
+        'compute_ms': (time.time() - started_at) * 1000,
+    }
+
+
+class Stats:
+    """Request counters and recent queue-wait / compute times (milliseconds)"""
+
+    def __init__(self, window=1000):
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.queue_ms = deque(maxlen=window)
+        self.compute_ms = deque(maxlen=window)
+
+    @staticmethod
+    def summary(values):
+        if not values:
+            return {'mean': None, 'p50': None, 'p99': None}
+        ordered = sorted(values)
+        return {
+            'mean': round(statistics.fmean(ordered), 3),
+            'p50': round(ordered[len(ordered) // 2], 3),
+            'p99': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+        }
+
+    def snapshot(self, pending):
+        return {
+            'pending': pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'queue_ms': self.summary(self.queue_ms),
+            'compute_ms': self.summary(self.compute_ms),
+        }
+
+
+@web.middleware
+async def cors(request, handler):
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+async def anonymize(request):
+    app = request.app
+    config = app[CONFIG]
+    if config['pending'] >= config['max_pending']:
+        app[STATS].rejected += 1
+        return web.json_response({'error': 'Server busy, try again shortly'}, status=429,
+                                 headers={'Retry-After': '1'})
+
+    # Counted before the first await, so concurrent requests see each other
+    config['pending'] += 1
+    try:
+        try:
+            data = await request.json()
+            text = data.get('text', '')
+        except (ValueError, AttributeError):
+            return web.json_response({'error': 'Expected a JSON object'}, status=400)
+
+        pool = app[POOL]
+        job = await asyncio.get_running_loop().run_in_executor(
+            pool, anonymize_job, text, data.get('entities'), data.get('exclude'), time.time()
+        )
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    except BrokenProcessPool:
+        # A worker died (killed, out of memory): the pool refuses every job from now on
+        app[STATS].failed += 1
+        restart_pool(app, pool)
+        return web.json_response({'error': 'Worker crashed, try again shortly'}, status=503,
+                                 headers={'Retry-After': '1'})
+    except Exception:
+        app[STATS].failed += 1
+        raise
+    finally:
+        config['pending'] -= 1
+
+    stats = app[STATS]
+    stats.completed += 1
+    stats.queue_ms.append(job.pop('queue_ms'))
+    stats.compute_ms.append(job.pop('compute_ms'))
+    timing = f"queue;dur={stats.queue_ms[-1]:.1f}, compute;dur={stats.compute_ms[-1]:.1f}"
+    return web.json_response(job, headers={'Server-Timing': timing})
+
+
+async def ready(request):
+    """Readiness probe: 200 once every worker has loaded the spaCy pipeline, 503 before and while a crashed pool is replaced"""
+    if READY not in request.app or not request.app[READY].is_set():
+        return web.json_response({'ready': False}, status=503)
+    return web.json_response({'ready': True})
+
+
+async def stats(request):
+    """Outstanding requests, rejections and recent queue-wait vs compute times"""
+    return web.json_response(request.app[STATS].snapshot(request.app[CONFIG]['pending']))
+
+
+def new_pool(app):
+    """Starts a pool of workers; READY is set once all of them have loaded the pipeline"""
+    workers = app[CONFIG]['workers']
+    # spawn: the server process runs an event loop, which forking doesn't mix well with
+    context = multiprocessing.get_context('spawn')
+    pool = app[POOL] = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                           initargs=(context.Barrier(workers),), mp_context=context)
+    app[READY].clear()
+    loop = asyncio.get_running_loop()
+
+    async def preload():
+        try:
+            await asyncio.gather(*(loop.run_in_executor(pool, warm_up) for _ in range(workers)))
+        except BrokenProcessPool:
+            # A worker failed to load the pipeline: stay unready
+            logging.exception('Starting the worker processes failed')
+            return
+        if app[POOL] is pool:
+            app[READY].set()
+
+    app[PRELOAD] = asyncio.create_task(preload())
+
+
+def restart_pool(app, broken):
+    """Replaces ``broken`` (unless a concurrent request already did); unready until the new one is loaded"""
+    if app[POOL] is not broken:
+        return
+    app[PRELOAD].cancel()
+    broken.shutdown(wait=False, cancel_futures=True)
+    new_pool(app)
+
+
+async def start_pool(app):
+    app[READY] = asyncio.Event()
+    new_pool(app)
+
+
+async def stop_pool(app):
+    app[PRELOAD].cancel()
+    app[POOL].shutdown(cancel_futures=True)
+
+
+def create_app(workers=None, max_pending=None):
+    app = web.Application(middlewares=[cors])
+    workers = workers or os.cpu_count() or 1
+    app[CONFIG] = {'workers': workers, 'max_pending': max_pending or workers * 8, 'pending': 0}
+    app[STATS] = Stats()
+    app.on_startup.append(start_pool)
+    app.on_cleanup.append(stop_pool)
+    app.router.add_post('/anonymize', anonymize)
+    app.router.add_get('/ready', ready)
+    app.router.add_get('/stats', stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Async PromptShield server for the browser extension')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--max-pending', type=int,
+                        help='Requests queued or running before answering 429 (default: 8 per worker)')
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.workers, args.max_pending), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
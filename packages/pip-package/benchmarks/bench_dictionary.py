@@ -0,0 +1,85 @@
+"""
+Build, save/load and scan time of a Dictionary rule for growing numbers of
+terms. Scan throughput should stay flat: an Aho-Corasick automaton reads
+each character once whatever the dictionary size.
+
+    python benchmarks/bench_dictionary.py --terms 1000,10000,100000,300000 --size 1MB
+"""
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import tempfile
+
+from corpus import generate, parse_size
+from pshield import Dictionary, PromptShield
+
+
+def make_terms(n: int, seed: int = 0):
+    """Codename-like and account-ID-like terms"""
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < n:
+        if rng.random() < 0.5:
+            terms.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12))).title()
+                      + ' ' + rng.choice(['Project', 'Labs', 'Holdings', 'Group']))
+        else:
+            terms.add(f"ACC-{rng.randint(0, 10 ** 9):09d}")
+    return sorted(terms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Dictionary rules of growing size')
+    parser.add_argument('--terms', default='1000,10000,100000', help='Dictionary sizes (default: 1000,10000,100000)')
+    parser.add_argument('--size', default='1MB', help='Text to scan (default: 1MB)')
+    parser.add_argument('--case-insensitive', action='store_true')
+    args = parser.parse_args()
+
+    text = generate(parse_size(args.size), density=0.05)
+    for n in (int(n) for n in args.terms.split(',')):
+        terms = make_terms(n)
+        # Put some of them in the text so there is something to find
+        words = text.split(' ')
+        rng = random.Random(n)
+        for i in rng.sample(range(len(words)), min(len(words) // 50, n)):
+            words[i] = rng.choice(terms)
+        sample = ' '.join(words)
+
+        start = time.perf_counter()
+        dictionary = Dictionary(terms, case_sensitive=not args.case_insensitive)
+        build = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'terms.ac')
+            dictionary.save(path)
+            start = time.perf_counter()
+            dictionary = Dictionary.load(path)
+            load = time.perf_counter() - start
+            saved = os.path.getsize(path)
+
+        start = time.perf_counter()
+        found = dictionary.find(sample)
+        scan = time.perf_counter() - start
+
+        shield = PromptShield(engine='regex')
+        shield.rules = {'account': {'dictionary': dictionary}, **shield.rules}
+        start = time.perf_counter()
+        shield.protect(sample, translate=False)
+        protect = time.perf_counter() - start
+
+        print(json.dumps({
+            'terms': n,
+            'build_s': round(build, 3),
+            'load_s': round(load, 3),
+            'file_mb': round(saved / 2 ** 20, 2),
+            'scan_mb_per_s': round(len(sample) / scan / 2 ** 20, 2),
+            'matches': len(found),
+            'protect_mb_per_s': round(len(sample) / protect / 2 ** 20, 2),
+        }))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
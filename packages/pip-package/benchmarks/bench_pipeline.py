@@ -0,0 +1,80 @@
+"""
+Compares spaCy loading profiles: load time, memory and per-document NER time.
+
+Every profile is measured in a fresh interpreter so load time and memory are
+cold-start numbers. Prints one JSON line per profile and one with the ratios.
+
+    python benchmarks/bench_pipeline.py --docs 200
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+DOCUMENT = (
+    "Marcus Hill emailed lina.petrova@example.com from Warsaw on 2024-05-30 about "
+    "invoice BUILD-2024-77X; Daniel Kwon in New York approved USD 3,500.00 the next day."
+)
+
+
+def max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def child(profile, docs):
+    before = max_rss_mb()
+    start = time.perf_counter()
+    from pshield import load_pipeline
+    nlp = load_pipeline(profile=profile)
+    load_s = time.perf_counter() - start
+
+    nlp(DOCUMENT)  # first call initialises lazily, keep it out of the timing
+    start = time.perf_counter()
+    for _ in range(docs):
+        nlp(DOCUMENT)
+    per_doc_ms = (time.perf_counter() - start) / docs * 1000
+
+    print(json.dumps({
+        'profile': profile,
+        'components': nlp.pipe_names,
+        'load_s': round(load_s, 4),
+        'rss_mb': round(max_rss_mb() - before, 1),
+        'per_doc_ms': round(per_doc_ms, 4),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare spaCy loading profiles')
+    parser.add_argument('--docs', type=int, default=200, help='Documents to time per profile (default: 200)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.docs)
+        return 0
+
+    results = {}
+    for profile in ('full', 'ner-only'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', profile, '--docs', str(args.docs)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[profile] = json.loads(output.strip().splitlines()[-1])
+        print(json.dumps(results[profile]))
+
+    full, slim = results['full'], results['ner-only']
+    print(json.dumps({
+        'speedup': {
+            key: round(full[key] / slim[key], 2) if slim[key] else None
+            for key in ('load_s', 'rss_mb', 'per_doc_ms')
+        }
+    }))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
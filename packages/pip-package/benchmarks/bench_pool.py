@@ -0,0 +1,50 @@
+"""
+Measures PromptShieldPool throughput for a growing number of workers.
+
+Prints one JSON line per worker count with documents per second and the
+speedup over one worker; with enough cores it should be close to linear.
+
+    python benchmarks/bench_pool.py --docs 2000 --workers 1 2 4 8
+"""
+import sys
+import json
+import time
+import argparse
+
+from pshield import PromptShieldPool
+
+DOCUMENT = (
+    "Marcus Hill emailed lina.petrova@example.com from Warsaw on 2024-05-30 about "
+    "invoice BUILD-2024-77X; Daniel Kwon in New York approved USD 3,500.00 the next day."
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure PromptShieldPool throughput per worker count')
+    parser.add_argument('--docs', type=int, default=2000, help='Documents per run (default: 2000)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts (default: 1 2 4)')
+    parser.add_argument('--chunksize', type=int, default=16, help='Documents per task (default: 16)')
+    args = parser.parse_args()
+
+    texts = [DOCUMENT] * args.docs
+    baseline = None
+    for workers in args.workers:
+        with PromptShieldPool(workers) as pool:
+            start = time.perf_counter()
+            for _ in pool.imap_unordered(texts, chunksize=args.chunksize, translate=False):
+                pass
+            elapsed = time.perf_counter() - start
+        docs_per_s = args.docs / elapsed
+        baseline = baseline or docs_per_s / workers
+        print(json.dumps({
+            'workers': workers,
+            'docs': args.docs,
+            'seconds': round(elapsed, 4),
+            'docs_per_s': round(docs_per_s, 1),
+            'speedup': round(docs_per_s / baseline, 2),
+        }))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
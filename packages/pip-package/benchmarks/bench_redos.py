@@ -0,0 +1,114 @@
+"""
+Worst-case throughput of the rule patterns on pathological input.
+
+Each family repeats a short unit that makes a backtracking regex rescan the
+same run of characters from many start positions (long digit runs, chains of
+word boundaries, "eyJ" repeated, ...), plus random strings from an alphabet of
+such pieces. Every rule's patterns are timed on growing sizes of each family,
+then protect() on the largest one. A pattern whose time per character grows
+with the input size is superlinear: with --check the run fails if any grows by
+more than --max-growth from the smallest to the largest size.
+
+    python benchmarks/bench_redos.py --sizes 4KB,16KB,64KB --check
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Callable, Dict, List
+
+from corpus import parse_size
+from pshield import PromptShield
+from pshield.matcher import compile_rules
+
+FAMILIES: Dict[str, Callable[[int], str]] = {
+    'digits': lambda n: '1' * n,
+    'digits_commas': lambda n: ('1,' * n)[:n],
+    'digits_spaces': lambda n: ('1 ' * n)[:n],
+    'hyphenated_digits': lambda n: ('1-' * n)[:n],
+    'hyphenated_code': lambda n: ('a-1-' * n)[:n],
+    'dotted_words': lambda n: ('a.' * n)[:n],
+    'dotted_then_at': lambda n: ('a.' * n)[:n // 2] + '@' + ('a.' * n)[:n // 2],
+    'at_signs': lambda n: ('a@' * n)[:n],
+    'glued_emails': lambda n: ('x@y.co.' * n)[:n],
+    'jwt_prefixes': lambda n: ('eyJ' * n)[:n],
+    'url_like': lambda n: 'https://' + ('a' * n)[:n],
+    'www_dots': lambda n: ('www.' * n)[:n],
+    'parentheses': lambda n: '1' + ('(' * n)[:n],
+    'unicode_word_runs': lambda n: ('é1-' * n)[:n],
+}
+
+PIECES = ['a', 'Z', '1', '9', '-', '.', '_', '@', '%', '+', '|', ' ', ',', '(', 'é', 'eyJ', 'USD', 'www.', 'x@y.co']
+
+
+def random_family(seed: int) -> Callable[[int], str]:
+    def generate(n: int) -> str:
+        rng = random.Random(seed)
+        text = []
+        while len(text) < n:
+            text.extend(rng.choice(PIECES))
+        return ''.join(text[:n])
+    return generate
+
+
+def time_pattern(pattern, text: str, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in pattern.finditer(text):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rule patterns on pathological input')
+    parser.add_argument('--sizes', default='4KB,16KB,64KB', help='Input sizes (default: 4KB,16KB,64KB)')
+    parser.add_argument('--random', type=int, default=4, help='Random families to add (default: 4)')
+    parser.add_argument('--runs', type=int, default=3, help='Repetitions, the fastest is kept (default: 3)')
+    parser.add_argument('--max-growth', type=float, default=4.0,
+                        help='Largest allowed growth of the time per character (default: 4)')
+    parser.add_argument('--check', action='store_true', help='Exit with 1 if a pattern grows more than that')
+    args = parser.parse_args()
+
+    sizes = sorted(parse_size(size) for size in args.sizes.split(','))
+    families = dict(FAMILIES)
+    for seed in range(args.random):
+        families[f'random_{seed}'] = random_family(seed)
+
+    shield = PromptShield(engine='regex')
+    matcher = compile_rules(shield.rules)
+    failures: List[Dict] = []
+    for family, generate in families.items():
+        texts = [generate(size) for size in sizes]
+        for priority, entity_type, pattern, _ in matcher.patterns:
+            seconds = [time_pattern(pattern, text, args.runs) for text in texts]
+            # Time per character, ignoring sizes too fast to measure
+            per_char = [s / len(text) for s, text in zip(seconds, texts) if s > 1e-5]
+            growth = per_char[-1] / per_char[0] if len(per_char) > 1 else 1.0
+            result = {
+                'family': family,
+                'pattern': f'{entity_type}[{priority[1] - 1}]',
+                'seconds': [round(s, 6) for s in seconds],
+                'mb_per_s': round(len(texts[-1]) / max(seconds[-1], 1e-9) / 2 ** 20, 2),
+                'growth': round(growth, 2),
+            }
+            print(json.dumps(result))
+            if growth > args.max_growth:
+                failures.append(result)
+
+        start = time.perf_counter()
+        shield.protect(texts[-1], translate=False)
+        seconds = time.perf_counter() - start
+        print(json.dumps({'family': family, 'pattern': 'protect', 'seconds': [round(seconds, 6)],
+                          'mb_per_s': round(len(texts[-1]) / seconds / 2 ** 20, 2)}))
+
+    for failure in failures:
+        print(f"Superlinear: {failure['pattern']} on {failure['family']} "
+              f"(time per character x{failure['growth']})", file=sys.stderr)
+    return 1 if args.check and failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Throughput of protect, restore_all, get_mapping and the batch/stream paths on
+a synthetic PII corpus (see corpus.py), per rule and per stage.
+
+Every measurement is repeated and the median kept. Prints one JSON line per
+measurement; --output also writes them, with the run's settings, to a JSON
+file, and --compare prints the ratio to such a file from another commit.
+
+    python benchmarks/bench_suite.py --size 1MB --density 0.1 --languages en=0.7,fr=0.3 --output head.json
+    python benchmarks/bench_suite.py --size 1MB --compare head.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+from corpus import generate_docs, parse_languages, parse_size
+from pshield import PromptShield, load_pipeline
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Suite:
+    def __init__(self, docs: List[str], runs: int, engine: str, translate: bool):
+        self.docs = docs
+        self.runs = runs
+        self.engine = engine
+        self.translate = translate
+        self.nlp = None if engine == 'regex' else load_pipeline()
+        self.chars = sum(len(doc) for doc in docs)
+        self.results: List[Dict] = []
+
+    def shield(self) -> PromptShield:
+        """A fresh instance (no placeholders yet) sharing the loaded pipeline"""
+        return PromptShield(nlp=self.nlp, engine=self.engine)
+
+    def record(self, name: str, timings: List[float], chars: Optional[int] = None, **extra) -> Dict:
+        median = statistics.median(timings)
+        chars = self.chars if chars is None else chars
+        result = {
+            'name': name,
+            'median_s': round(median, 6),
+            'min_s': round(min(timings), 6),
+            'mb_per_s': round(chars / median / 2 ** 20, 3) if median and chars else None,
+            **extra,
+        }
+        self.results.append(result)
+        print(json.dumps(result))
+        return result
+
+    def measure(self, name: str, run: Callable[[], object], chars: Optional[int] = None, **extra) -> Dict:
+        """Median wall time of ``runs`` calls of ``run``"""
+        timings = []
+        for _ in range(self.runs):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return self.record(name, timings, chars, **extra)
+
+    def protect_all(self, shield: PromptShield, **options) -> List[str]:
+        return [shield.protect(doc, translate=self.translate, **options) for doc in self.docs]
+
+    def run(self):
+        # Whole pipeline, then the same calls split by stage
+        self.measure('protect', lambda: self.protect_all(self.shield()))
+        stages: Dict[str, List[float]] = {}
+        for _ in range(self.runs):
+            shield, totals = self.shield(), {}
+            for doc in self.docs:
+                shield.protect(doc, translate=self.translate)
+                for stage, seconds in shield.timings.items():
+                    totals[stage] = totals.get(stage, 0.0) + seconds
+            for stage, seconds in totals.items():
+                stages.setdefault(stage, []).append(seconds)
+        for stage, timings in stages.items():
+            self.record(f'stage:{stage}', timings)
+
+        # One rule at a time; NER rules include the spaCy pass they need
+        for rule in self.shield().rules:
+            self.measure(f'rule:{rule}', lambda: self.protect_all(self.shield(), entities={rule}))
+
+        shield = self.shield()
+        protected = self.protect_all(shield)
+        placeholders = len(shield.get_mapping())
+        protected_chars = sum(len(doc) for doc in protected)
+        self.measure('restore_all', lambda: [shield.restore_all(doc) for doc in protected],
+                     chars=protected_chars, placeholders=placeholders)
+        self.measure('get_mapping', shield.get_mapping, chars=0, placeholders=placeholders)
+
+        if self.nlp is not None:
+            self.measure('protect_batch', lambda: self.shield().protect_batch(self.docs, translate=self.translate))
+        self.measure('protect_stream', lambda: list(self.shield().protect_stream(self.docs,
+                                                                                 translate=self.translate)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PromptShield on a synthetic PII corpus')
+    parser.add_argument('--size', default='256KB', help='Corpus size, e.g. 1KB .. 100MB (default: 256KB)')
+    parser.add_argument('--density', type=float, default=0.1, help='Share of words that are PII (default: 0.1)')
+    parser.add_argument('--languages', default='en', help='Language mix, e.g. en=0.7,fr=0.3 (default: en)')
+    parser.add_argument('--doc-size', type=int, default=2048, help='Characters per document (default: 2048)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=3, help='Repetitions per measurement (default: 3)')
+    parser.add_argument('--engine', choices=PromptShield.ENGINES, default='spacy')
+    parser.add_argument('--translate', action='store_true', help='Translate placeholders (detects languages)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', help='Print the speedup against results written with --output')
+    args = parser.parse_args()
+
+    corpus = {
+        'size': parse_size(args.size),
+        'density': args.density,
+        'languages': parse_languages(args.languages),
+        'doc_size': args.doc_size,
+        'seed': args.seed,
+    }
+    docs = generate_docs(**corpus)
+    suite = Suite(docs, args.runs, args.engine, args.translate)
+    suite.run()
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': args.engine,
+        'translate': args.translate,
+        'runs': args.runs,
+        'corpus': {**corpus, 'docs': len(docs), 'chars': suite.chars},
+        'results': suite.results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous['corpus'] != report['corpus'] or previous['engine'] != args.engine:
+            print("Warning: the baseline was measured on another corpus or engine", file=sys.stderr)
+        baseline = {result['name']: result for result in previous['results']}
+        for result in suite.results:
+            before = baseline.get(result['name'])
+            if before and result['median_s']:
+                print(json.dumps({'name': result['name'], 'baseline_s': before['median_s'],
+                                  'median_s': result['median_s'],
+                                  'speedup': round(before['median_s'] / result['median_s'], 3)}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Deterministic synthetic PII corpus for the benchmarks.
+
+Documents are sentences of filler words in a mix of languages with sensitive
+values mixed in: one value generator per PromptShield rule. The same
+arguments always give the same corpus, so numbers from different commits
+compare like for like.
+
+    python benchmarks/corpus.py --size 1MB --density 0.1 --languages en=0.6,fr=0.2,pl=0.2 > corpus.txt
+"""
+import sys
+import random
+import string
+import argparse
+from typing import Callable, Dict, List, Optional
+
+FILLER = {
+    'en': "the report says we should check this before the meeting and send it to the team again later "
+          "please note that all values were updated after review of our account records".split(),
+    'fr': "le rapport indique que nous devons vérifier cela avant la réunion et envoyer le tout à "
+          "l'équipe plus tard merci de noter que les valeurs ont été mises à jour après revue".split(),
+    'de': "der bericht sagt dass wir das vor dem treffen prüfen und es später noch einmal an das "
+          "team schicken sollen bitte beachten dass alle werte nach der prüfung geändert wurden".split(),
+    'es': "el informe dice que debemos revisar esto antes de la reunión y enviarlo al equipo más "
+          "tarde tenga en cuenta que todos los valores se actualizaron después de la revisión".split(),
+    'pl': "raport mówi że powinniśmy to sprawdzić przed spotkaniem i wysłać to później do zespołu "
+          "proszę pamiętać że wszystkie wartości zostały zaktualizowane po przeglądzie".split(),
+}
+
+FIRST_NAMES = ["Marcus", "Lina", "Daniel", "Priya", "Ivan", "Hannah", "Sara", "Noah", "Yuki", "Omar", "Carla",
+               "Lucas", "Aisha", "Pierre", "Zofia", "Jurgen", "Lucia"]
+LAST_NAMES = ["Hill", "Petrova", "Kwon", "Nandakumar", "Volkov", "Bloom", "Richter", "Tanaka", "Aziz", "Mendes",
+              "Meyer", "Rahman", "Dubois", "Nowak", "Schmidt", "Garcia"]
+PLACES = ["Warsaw", "New York", "Tallinn", "London", "Tokyo", "Toronto", "Paris", "Berlin", "Madrid", "Krakow"]
+CURRENCIES = ["USD", "EUR", "GBP", "JPY"]
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+B64URL = string.ascii_letters + string.digits + "_-"
+
+
+def _digits(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice(string.digits) for _ in range(n))
+
+
+def _chars(rng: random.Random, alphabet: str, n: int) -> str:
+    return "".join(rng.choice(alphabet) for _ in range(n))
+
+
+# One value generator per PromptShield rule
+VALUES: Dict[str, Callable[[random.Random], str]] = {
+    'mem': lambda rng: f"{rng.choice([2, 4, 16, 32, 64, 256, 512])}{rng.choice(['MB', 'GB', ' GB', 'TB'])}",
+    'cvv': lambda rng: f"CVV {_digits(rng, 3)}",
+    'exp': lambda rng: f"exp {rng.randint(1, 12):02d}/{rng.randint(2025, 2032)}",
+    'card': lambda rng: "-".join(_digits(rng, 4) for _ in range(4)),
+    'date': lambda rng: f"{rng.randint(2000, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    'email': lambda rng: f"{rng.choice(FIRST_NAMES).lower()}.{rng.choice(LAST_NAMES).lower()}{rng.randint(1, 999)}"
+                         f"@{rng.choice(['example.com', 'mail.test', 'corp.example'])}",
+    'url': lambda rng: f"https://{rng.choice(['app', 'docs', 'pay'])}.example.{rng.choice(['com', 'org'])}"
+                       f"/{_chars(rng, string.ascii_lowercase, 6)}?id={rng.randint(1, 99999)}",
+    'ip': lambda rng: ".".join(str(rng.randint(1, 254)) for _ in range(4)),
+    'phone': lambda rng: f"+{rng.randint(1, 99)} {_digits(rng, 3)} {_digits(rng, 3)} {_digits(rng, 3)}",
+    'amount': lambda rng: f"{rng.choice(CURRENCIES)} {rng.randint(1, 99)},{_digits(rng, 3)}.{_digits(rng, 2)}",
+    'name': lambda rng: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+    'place': lambda rng: rng.choice(PLACES),
+    'jwt': lambda rng: f"eyJ{_chars(rng, B64URL, 20)}.eyJ{_chars(rng, B64URL, 24)}.{_chars(rng, B64URL, 43)}",
+    'btc_address': lambda rng: "1" + _chars(rng, BASE58, 33),
+    'eth_address': lambda rng: "0x" + _chars(rng, "0123456789abcdef", 40),
+    'username': lambda rng: f"@{rng.choice(FIRST_NAMES).lower()}_{rng.randint(1, 99)}",
+    'alnum_code': lambda rng: f"{_chars(rng, string.ascii_uppercase, 4)}-{rng.randint(2000, 2030)}-"
+                              f"{_chars(rng, string.ascii_uppercase + string.digits, 3)}",
+    'coord': lambda rng: f"{rng.uniform(-89, 89):.4f},{rng.uniform(-179, 179):.4f}",
+}
+
+UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(size: str) -> int:
+    """'64KB' -> 65536; plain numbers are bytes"""
+    size = size.strip().upper()
+    for unit in sorted(UNITS, key=len, reverse=True):
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * UNITS[unit])
+    return int(size)
+
+
+def parse_languages(spec: str) -> Dict[str, float]:
+    """'en=0.7,fr=0.3' -> {'en': 0.7, 'fr': 0.3}; a bare code weighs 1"""
+    languages = {}
+    for part in spec.split(','):
+        code, _, weight = part.partition('=')
+        if code.strip() not in FILLER:
+            raise ValueError(f"Unknown language {code!r}, expected one of {sorted(FILLER)}")
+        languages[code.strip()] = float(weight) if weight else 1.0
+    return languages
+
+
+def generate_docs(size: int, density: float = 0.1, languages: Optional[Dict[str, float]] = None,
+                  doc_size: int = 2048, entities: Optional[List[str]] = None, seed: int = 0) -> List[str]:
+    """
+    Generates documents totalling about ``size`` characters.
+
+    Args:
+        size: Total characters to generate
+        density: Share of words that are sensitive values (0..1)
+        languages: Language code -> weight; each document is in one language
+        doc_size: Characters per document (the last one may be shorter)
+        entities: Rules to generate values for (default: all of VALUES)
+        seed: Random seed; the same arguments always give the same documents
+
+    Returns:
+        The documents, each made of whole sentences
+    """
+    rng = random.Random(seed)
+    languages = languages or {'en': 1.0}
+    codes, weights = list(languages), list(languages.values())
+    generators = [VALUES[entity] for entity in (entities or VALUES)]
+
+    docs, total = [], 0
+    while total < size:
+        filler = FILLER[rng.choices(codes, weights)[0]]
+        limit = min(doc_size, size - total)
+        sentences, length = [], 0
+        while length < limit:
+            words = [
+                rng.choice(generators)(rng) if rng.random() < density else rng.choice(filler)
+                for _ in range(rng.randint(6, 18))
+            ]
+            sentence = " ".join(words)
+            sentence = sentence[0].upper() + sentence[1:] + "."
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        doc = " ".join(sentences)
+        docs.append(doc)
+        total += len(doc)
+    return docs
+
+
+def generate(size: int, density: float = 0.1, languages: Optional[Dict[str, float]] = None,
+             seed: int = 0) -> str:
+    """Same as generate_docs(), as one text with a blank line between documents"""
+    return "\n\n".join(generate_docs(size, density, languages, seed=seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a deterministic synthetic PII corpus to stdout')
+    parser.add_argument('--size', default='1MB', help='Total size, e.g. 1KB, 64MB (default: 1MB)')
+    parser.add_argument('--density', type=float, default=0.1, help='Share of words that are PII (default: 0.1)')
+    parser.add_argument('--languages', default='en', help='Language mix, e.g. en=0.7,fr=0.3 (default: en)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sys.stdout.write(generate(parse_size(args.size), args.density, parse_languages(args.languages), args.seed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
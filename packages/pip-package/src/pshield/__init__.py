@@ -1,3 +1,12 @@
-from pshield.pshield import PromptShield
+from pshield.pshield import DetectionTimeout, PromptShield, ProtectedDocument, Span, StreamRestorer
+from pshield.dictionary import Dictionary
+from pshield.instrumentation import Instrumentation
+from pshield.pipeline import load_pipeline, ner_only
+from pshield.pool import PromptShieldPool, Protected
+from pshield.store import MappingStore, MemoryMappingStore, Session
+from pshield.translation import CachedTranslator, GoogleLabelTranslator, OfflineTranslator, Translator
 
-__all__ = ['PromptShield']
\ No newline at end of file
+__all__ = ['PromptShield', 'Span', 'StreamRestorer', 'Translator', 'OfflineTranslator', 'CachedTranslator',
+           'GoogleLabelTranslator', 'load_pipeline', 'ner_only', 'PromptShieldPool', 'Protected',
+           'MappingStore', 'MemoryMappingStore', 'Session', 'Instrumentation', 'DetectionTimeout',
+           'Dictionary', 'ProtectedDocument']
\ No newline at end of file
@@ -0,0 +1,161 @@
+import pickle
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# Bits of a transition key taken by the character (any code point fits)
+CHAR_BITS = 21
+# Bumped whenever the saved layout changes
+FORMAT_VERSION = 1
+
+
+def _fold(text: str) -> str:
+    """Lower-cases ``text`` without changing its length, so offsets stay valid"""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # A few characters lower-case to two ("İ"); keep those as they are
+    return ''.join(lower if len(lower) == 1 else c for c, lower in ((c, c.lower()) for c in text))
+
+
+def _is_word(c: str) -> bool:
+    return c.isalnum() or c == '_'
+
+
+class Dictionary:
+    """
+    Finds every occurrence of a fixed list of terms in one pass (Aho-Corasick).
+
+    Meant for deny-lists too large for a regex alternation: customer names,
+    project codenames, account IDs. The automaton is built once, and
+    scanning costs the same whatever the number of terms. Use it as the
+    ``dictionary`` of a rule; its matches take part in overlap resolution
+    like NER and custom detectors:
+
+        shield.rules['customer'] = {'dictionary': Dictionary(names, case_sensitive=False)}
+
+    Args:
+        terms: The terms to look for; empty ones are ignored
+        case_sensitive: If False, terms and text are compared lower-cased
+        word_boundary: Only report terms not glued to a letter, digit or
+            underscore on either side, like regex ``\\b`` around the term
+    """
+
+    def __init__(self, terms: Iterable[str] = (), case_sensitive: bool = True, word_boundary: bool = True):
+        self.case_sensitive = case_sensitive
+        self.word_boundary = word_boundary
+        # (state << CHAR_BITS | ord(char)) -> next state; state 0 is the root
+        self.goto: Dict[int, int] = {}
+        # Per state: length of the term ending there (0 if none), the state
+        # to continue from on a mismatch, and the nearest state on the fail
+        # chain where a term ends
+        self.lengths = array('i', [0])
+        self.fail = array('i', [0])
+        self.output = array('i', [0])
+        self.terms = 0
+        self._build(terms)
+
+    def _build(self, terms: Iterable[str]):
+        goto, lengths = self.goto, self.lengths
+        children: List[List[Tuple[int, int]]] = [[]]
+        for term in terms:
+            if not self.case_sensitive:
+                term = _fold(term)
+            if not term:
+                continue
+            state = 0
+            for c in term:
+                key = state << CHAR_BITS | ord(c)
+                child = goto.get(key)
+                if child is None:
+                    child = goto[key] = len(lengths)
+                    lengths.append(0)
+                    children.append([])
+                    children[state].append((ord(c), child))
+                state = child
+            if not lengths[state]:
+                self.terms += 1
+            lengths[state] = len(term)
+
+        fail = self.fail = array('i', [0]) * len(lengths)
+        output = self.output = array('i', [0]) * len(lengths)
+        # Breadth first, so every fail target is done before it's needed
+        queue = deque(child for _, child in children[0])
+        while queue:
+            state = queue.popleft()
+            for o, child in children[state]:
+                queue.append(child)
+                target = fail[state]
+                nxt = goto.get(target << CHAR_BITS | o)
+                while nxt is None and target:
+                    target = fail[target]
+                    nxt = goto.get(target << CHAR_BITS | o)
+                nxt = nxt or 0
+                fail[child] = nxt
+                output[child] = nxt if lengths[nxt] else output[nxt]
+
+    def __len__(self) -> int:
+        return self.terms
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Every occurrence of a term in ``text``, overlapping ones included.
+
+        Returns:
+            (entity_value, start, end) tuples, like a ``custom`` detector, ordered by end
+        """
+        folded = text if self.case_sensitive else _fold(text)
+        goto, lengths, fail, output = self.goto, self.lengths, self.fail, self.output
+        word_boundary = self.word_boundary
+        found = []
+        state = 0
+        for end, c in enumerate(folded, 1):
+            o = ord(c)
+            nxt = goto.get(state << CHAR_BITS | o)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto.get(state << CHAR_BITS | o)
+            state = nxt or 0
+            match = state if lengths[state] else output[state]
+            while match:
+                start = end - lengths[match]
+                if not word_boundary or (
+                        (start == 0 or not (_is_word(text[start - 1]) and _is_word(text[start])))
+                        and (end == len(text) or not (_is_word(text[end - 1]) and _is_word(text[end])))):
+                    found.append((text[start:end], start, end))
+                match = output[match]
+        return found
+
+    def save(self, path: str):
+        """Writes the built automaton to ``path``, for load()"""
+        with open(path, 'wb') as f:
+            pickle.dump({
+                'version': FORMAT_VERSION,
+                'case_sensitive': self.case_sensitive,
+                'word_boundary': self.word_boundary,
+                'terms': self.terms,
+                'goto': self.goto,
+                'lengths': self.lengths,
+                'fail': self.fail,
+                'output': self.output,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'Dictionary':
+        """
+        Reads an automaton written by save(), without rebuilding it.
+
+        Uses pickle: only load files you wrote yourself.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path} holds a dictionary in format {state.get('version')!r}, "
+                             f"expected {FORMAT_VERSION}")
+        dictionary = cls.__new__(cls)
+        for key in ('case_sensitive', 'word_boundary', 'terms', 'goto', 'lengths', 'fail', 'output'):
+            setattr(dictionary, key, state[key])
+        return dictionary
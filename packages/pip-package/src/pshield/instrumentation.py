@@ -0,0 +1,137 @@
+import bisect
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# entity_type -> [seconds, candidates, entities] for one call
+RuleStats = Dict[str, List[float]]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects it"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs, the last one for "+Inf" """
+        total, pairs = 0, []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return pairs
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class Instrumentation:
+    """
+    Opt-in timings of PromptShield calls, see PromptShield.instrument().
+
+    Records the wall time of every protect/protect_batch/protect_stream call,
+    the seconds per stage (the keys of ``shield.timings``) and, per rule, the
+    seconds spent finding its candidates, how many it found and how many were
+    kept after overlap resolution. Safe to share between threads and between
+    an instance and its session views.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.calls: Dict[str, Histogram] = {}
+        self.chars: Dict[str, int] = {}
+        self.stages: Dict[str, Histogram] = {}
+        self.rules: Dict[str, List[float]] = {}
+        self.callbacks: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[Dict], None]):
+        """
+        Calls ``callback`` after every instrumented call with a dict holding
+        ``call``, ``seconds``, ``chars``, ``stages`` (stage -> seconds) and
+        ``rules`` (entity type -> {"seconds", "candidates", "entities"}).
+        """
+        self.callbacks.append(callback)
+
+    def record(self, call: str, seconds: float, chars: int, stages: Dict[str, float], rules: RuleStats):
+        with self._lock:
+            self.calls.setdefault(call, Histogram(self.buckets)).observe(seconds)
+            self.chars[call] = self.chars.get(call, 0) + chars
+            for stage, stage_seconds in stages.items():
+                self.stages.setdefault(stage, Histogram(self.buckets)).observe(stage_seconds)
+            for entity_type, values in rules.items():
+                totals = self.rules.setdefault(entity_type, [0.0, 0, 0])
+                for i, value in enumerate(values):
+                    totals[i] += value
+        if self.callbacks:
+            event = {
+                'call': call,
+                'seconds': seconds,
+                'chars': chars,
+                'stages': dict(stages),
+                'rules': {
+                    entity_type: {'seconds': values[0], 'candidates': values[1], 'entities': values[2]}
+                    for entity_type, values in rules.items()
+                },
+            }
+            for callback in self.callbacks:
+                callback(event)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Totals so far: per call type and per stage ``count`` and ``seconds``,
+        per rule ``seconds``, ``candidates`` and ``entities``. Rules are listed
+        slowest first.
+        """
+        with self._lock:
+            return {
+                'calls': {call: {'count': h.count, 'seconds': h.sum, 'chars': self.chars[call]}
+                          for call, h in self.calls.items()},
+                'stages': {stage: {'count': h.count, 'seconds': h.sum} for stage, h in self.stages.items()},
+                'rules': {
+                    entity_type: {'seconds': values[0], 'candidates': values[1], 'entities': values[2]}
+                    for entity_type, values in sorted(self.rules.items(), key=lambda item: -item[1][0])
+                },
+            }
+
+    def prometheus(self, prefix: str = 'pshield') -> str:
+        """The recorded metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def histograms(name: str, help_text: str, label: str, values: Dict[str, Histogram]):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for key, histogram in values.items():
+                for le, count in histogram.cumulative():
+                    lines.append(f'{prefix}_{name}_bucket{{{_labels(**{label: key}, le=le)}}} {count}')
+                lines.append(f'{prefix}_{name}_sum{{{_labels(**{label: key})}}} {histogram.sum!r}')
+                lines.append(f'{prefix}_{name}_count{{{_labels(**{label: key})}}} {histogram.count}')
+
+        def counters(name: str, help_text: str, label: str, values: Dict[str, float]):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            for key, value in values.items():
+                lines.append(f'{prefix}_{name}{{{_labels(**{label: key})}}} {value!r}')
+
+        with self._lock:
+            histograms('call_seconds', 'Wall time of protect calls', 'call', self.calls)
+            counters('chars_total', 'Characters protected', 'call', self.chars)
+            histograms('stage_seconds', 'Time per call spent in each stage', 'stage', self.stages)
+            counters('rule_seconds_total', 'Time spent finding candidates per rule', 'rule',
+                     {rule: values[0] for rule, values in self.rules.items()})
+            counters('rule_candidates_total', 'Candidates found per rule', 'rule',
+                     {rule: values[1] for rule, values in self.rules.items()})
+            counters('rule_entities_total', 'Entities kept per rule after overlap resolution', 'rule',
+                     {rule: values[2] for rule, values in self.rules.items()})
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,239 @@
+import re
+import time
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+# (start, end, entity_value, entity_type, mode)
+Entity = Tuple[int, int, str, str, str]
+# Entity plus its (rule_index, sub_index) priority, used to break ties
+RankedEntity = Tuple[int, int, str, str, str, Tuple[int, int]]
+# (entity_type, patterns, mode, triggers, trigger_class) per rule, in rule order
+RuleSpec = Tuple[Tuple[str, Tuple[str, ...], str, Tuple[str, ...], Optional[str]], ...]
+
+WORD_BOUNDARY = r'\b'
+# A pattern with a group of this name reports only that group as the entity;
+# the rest of the match is context (see the linear rewrites in PromptShield.rules)
+ENTITY_GROUP = 'entity'
+# Backreferences, named groups and global inline flags change meaning (or
+# fail to compile) once a pattern is embedded in a larger alternation
+UNEMBEDDABLE = re.compile(r'\\[1-9]|\(\?P[<=]|^\(\?[aiLmsux]+\)')
+# Scanners kept per matcher, one per combination of rules ruled out by their triggers
+MAX_SCANNERS = 256
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    escaped = False
+    for c in pattern:
+        if escaped:
+            escaped = False
+        elif c == '\\':
+            escaped = True
+        elif in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+    return False
+
+
+class RuleMatcher:
+    """
+    Compiled form of the regex patterns in ``PromptShield.rules``.
+
+    Every pattern is compiled once per distinct rule set and the result is
+    shared by all PromptShield instances using those rules, so detection no
+    longer goes through ``re``'s global pattern cache on each call.
+
+    The patterns are also joined into one scanner that finds the first
+    position where *any* rule matches. Text with no candidates costs that
+    single pass, and otherwise every pattern starts scanning there instead
+    of at 0. Past that point the patterns are still scanned one by one: a
+    pattern's own matches never overlap, and which of them exist decides
+    which entity wins where rules overlap, so resolving on the joined
+    alternation alone would change results.
+
+    Before any of that, rules declaring ``triggers`` (literals, one of which
+    every match contains) or a ``trigger_class`` (a character class, one
+    character of which every match contains) are ruled out when the text has
+    none of them; each distinct trigger is looked for once per text, and the
+    joined scanner only covers the rules left.
+    """
+
+    def __init__(self, spec: RuleSpec):
+        # (priority, entity_type, compiled pattern, mode)
+        self.patterns: List[Tuple[Tuple[int, int], str, Pattern, str]] = [
+            ((rule_index, pattern_index + 1), entity_type, re.compile(pattern), mode)
+            for rule_index, (entity_type, patterns, mode, _, _) in enumerate(spec)
+            for pattern_index, pattern in enumerate(patterns)
+        ]
+        self.pattern_rules = len({priority[0] for priority, *_ in self.patterns})
+        # rule_index -> (trigger literals, trigger class) of the rules with patterns that declare any
+        classes: Dict[str, Pattern] = {}
+        self.triggers: Dict[int, Tuple[Tuple[str, ...], Optional[Pattern]]] = {
+            rule_index: (triggers, classes.setdefault(trigger_class, re.compile(trigger_class))
+                         if trigger_class else None)
+            for rule_index, (_, patterns, _, triggers, trigger_class) in enumerate(spec)
+            if patterns and (triggers or trigger_class)
+        }
+        # Group reported per pattern: the whole match or its ENTITY_GROUP
+        self.groups: Dict[Tuple[int, int], object] = {
+            priority: ENTITY_GROUP if ENTITY_GROUP in compiled.groupindex else 0
+            for priority, _, compiled, _ in self.patterns
+        }
+
+        self.unscanned = {
+            priority for priority, _, compiled, _ in self.patterns if UNEMBEDDABLE.search(compiled.pattern)
+        }
+        # Scanner per set of ruled out rules, joining only the patterns still to run
+        self._scanners: Dict[FrozenSet[int], Optional[Pattern]] = {}
+        self.scanner = self.scanner_for(frozenset())
+
+    def scanner_for(self, ruled_out: FrozenSet[int]) -> Optional[Pattern]:
+        """The joined scanner of the embeddable patterns of all rules but ``ruled_out``, None if there are none"""
+        if ruled_out in self._scanners:
+            return self._scanners[ruled_out]
+        bounded, unbounded = [], []
+        for priority, entity_type, compiled, mode in self.patterns:
+            pattern = compiled.pattern
+            if priority in self.unscanned or priority[0] in ruled_out:
+                continue
+            # "\bA|\bB" is "\b(?:A|B)": one boundary test per position
+            # instead of one per pattern
+            if pattern.startswith(WORD_BOUNDARY) and not _has_top_level_alternation(pattern):
+                bounded.append(f"(?:{pattern[len(WORD_BOUNDARY):]})")
+            else:
+                unbounded.append(f"(?:{pattern})")
+        if bounded:
+            unbounded.insert(0, WORD_BOUNDARY + "(?:" + "|".join(bounded) + ")")
+        scanner = re.compile("|".join(unbounded)) if unbounded else None
+        if len(self._scanners) >= MAX_SCANNERS:
+            self._scanners.clear()
+        self._scanners[ruled_out] = scanner
+        return scanner
+
+    def ruled_out(self, text: str) -> FrozenSet[int]:
+        """Indices of the rules whose patterns can't match ``text``: none of their triggers occur in it"""
+        found: Dict[object, bool] = {}
+        ruled_out = set()
+        for rule_index, (literals, trigger_class) in self.triggers.items():
+            if literals:
+                for literal in literals:
+                    if literal not in found:
+                        found[literal] = literal in text
+                    if found[literal]:
+                        break
+                else:
+                    ruled_out.add(rule_index)
+                    continue
+            if trigger_class is not None:
+                if trigger_class not in found:
+                    found[trigger_class] = trigger_class.search(text) is not None
+                if not found[trigger_class]:
+                    ruled_out.add(rule_index)
+        return frozenset(ruled_out)
+
+    def first_candidate(self, text: str, ruled_out: FrozenSet[int] = frozenset()) -> Optional[int]:
+        """Returns the first position a scanned pattern of a rule not ``ruled_out`` matches at, None if there is none"""
+        scanner = self.scanner_for(ruled_out)
+        if scanner is None:
+            return None
+        match = scanner.search(text)
+        return match.start() if match is not None else None
+
+    def candidates(self, text: str, extra: Iterable[RankedEntity] = (),
+                   stats: Optional[Dict[str, List[float]]] = None, deadline: Optional[float] = None,
+                   skipped: Optional[List[str]] = None) -> List[RankedEntity]:
+        """
+        Every pattern match in ``text``, plus ``extra``, before overlaps are resolved.
+
+        Args:
+            text: The text to scan
+            extra: Entities found by other detectors (NER, custom functions)
+            stats: If given, ``stats[entity_type][0]`` and ``[1]`` are increased
+                by the seconds spent on and the matches found by that rule's patterns
+            deadline: ``time.perf_counter()`` value after which no further pattern
+                is started (a running one is never interrupted)
+            skipped: Receives the entity types of the patterns left out because of ``deadline``
+        """
+        candidates = list(extra)
+        ruled_out = self.ruled_out(text) if self.triggers else frozenset()
+        if len(ruled_out) == self.pattern_rules:
+            return candidates
+        first = self.first_candidate(text, ruled_out)
+        for priority, entity_type, pattern, mode in self.patterns:
+            pos = 0 if priority in self.unscanned else first
+            if pos is None or priority[0] in ruled_out:
+                continue
+            if deadline is not None and time.perf_counter() > deadline:
+                if skipped is not None and entity_type not in skipped:
+                    skipped.append(entity_type)
+                continue
+            found = len(candidates)
+            start = time.perf_counter() if stats is not None else 0.0
+            group = self.groups[priority]
+            candidates.extend(
+                (match.start(group), match.end(group), match.group(group), entity_type, mode, priority)
+                for match in pattern.finditer(text, pos)
+            )
+            if stats is not None:
+                rule_stats = stats.setdefault(entity_type, [0.0, 0, 0])
+                rule_stats[0] += time.perf_counter() - start
+                rule_stats[1] += len(candidates) - found
+        return candidates
+
+    @staticmethod
+    def select(candidates: List[RankedEntity]) -> List[Entity]:
+        """
+        Resolves overlaps leftmost-longest; among candidates with the same
+        span the earlier rule wins, and within a rule NER/custom entities come
+        before its patterns.
+
+        Returns:
+            Entities as (start, end, entity_value, entity_type, mode), sorted by start
+        """
+        candidates.sort(key=lambda x: (x[0], -x[1], x[5]))
+
+        entities: List[Entity] = []
+        last_end = -1
+        for start, end, entity_value, entity_type, mode, _ in candidates:
+            if start >= last_end:
+                entities.append((start, end, entity_value, entity_type, mode))
+                last_end = end
+
+        return entities
+
+    def resolve(self, text: str, extra: Iterable[RankedEntity] = ()) -> List[Entity]:
+        """
+        Finds the non-overlapping entities in ``text``, see select().
+
+        Args:
+            text: The text to scan
+            extra: Entities found by other detectors (NER, custom functions),
+                merged into the same resolution
+
+        Returns:
+            Entities as (start, end, entity_value, entity_type, mode), sorted by start
+        """
+        return self.select(self.candidates(text, extra))
+
+
+@lru_cache(maxsize=32)
+def _compile(spec: RuleSpec) -> RuleMatcher:
+    return RuleMatcher(spec)
+
+
+def compile_rules(rules: Dict[str, dict]) -> RuleMatcher:
+    """Returns the (cached) RuleMatcher for a ``PromptShield.rules`` dict"""
+    spec = tuple(
+        (entity_type, tuple(rule.get('patterns', ())), rule.get('mode', 'placeholder'),
+         tuple(rule.get('triggers', ())), rule.get('trigger_class'))
+        for entity_type, rule in rules.items()
+    )
+    return _compile(spec)
@@ -0,0 +1,91 @@
+import re
+from typing import Iterator, Tuple
+
+DEFAULT_MODEL = "en_core_web_sm"
+PROFILES = ("ner-only", "full")
+
+# Components of the trained English pipelines that the NER rules never read:
+# they only use doc.ents, and the NER component has its own tok2vec layer
+NER_ONLY_EXCLUDE = ("tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "morphologizer")
+
+# Where a sentence ends, for sentence_chunks(): after ".", "!" or "?" (and any
+# closing quotes or brackets) followed by whitespace, or at a line break.
+# Punctuation rather than spaCy's senter/parser, which would need a pass over
+# the whole text themselves
+SENTENCE_END = re.compile(r'[.!?]+["\')\]\u201d]*\s+|\n\s*')
+
+
+def sentence_chunks(text: str, size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Splits ``text`` into (start, end) ranges of whole sentences, each at most
+    ``size`` characters unless one sentence alone is longer. The ranges cover
+    the text without gaps, in order.
+    """
+    start = end = 0
+    for match in SENTENCE_END.finditer(text):
+        if match.end() - start > size and end > start:
+            yield start, end
+            start = end
+        end = match.end()
+    if len(text) - start > size and end > start:
+        yield start, end
+        start = end
+    if start < len(text):
+        yield start, len(text)
+
+
+def _listens_upstream(nlp) -> bool:
+    """Whether the NER component reads features from a shared tok2vec/transformer component"""
+    if "ner" not in nlp.pipe_names:
+        return False
+    # A rule-based "ner" (e.g. an entity_ruler) has no model at all
+    model = getattr(nlp.get_pipe("ner"), "model", None)
+    return model is not None and any(node.name.endswith("-listener") for node in model.walk())
+
+
+def ner_only(nlp):
+    """
+    Disables, in place, every component of a loaded pipeline that NER doesn't need.
+
+    A shared tok2vec/transformer component that NER listens to is kept.
+    Disabled components can be brought back with ``nlp.enable_pipe()``.
+
+    Returns:
+        The same pipeline, for chaining
+    """
+    keep = {"ner"} | {
+        name for name, pipe in nlp.pipeline
+        if "ner" in getattr(pipe, "listening_components", ())
+    }
+    for name in nlp.pipe_names:
+        if name not in keep:
+            nlp.disable_pipe(name)
+    return nlp
+
+
+def load_pipeline(name: str = DEFAULT_MODEL, profile: str = "ner-only"):
+    """
+    Loads a spaCy pipeline for PromptShield.
+
+    Args:
+        name: spaCy package name or path
+        profile: "ner-only" leaves out the components the rules don't use, so
+            loading is faster, uses less memory and every document is cheaper;
+            "full" loads every component
+
+    Returns:
+        The loaded ``spacy.Language``
+    """
+    import spacy
+
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}, expected one of {PROFILES}")
+    if profile == "full":
+        return spacy.load(name)
+
+    nlp = spacy.load(name, exclude=NER_ONLY_EXCLUDE)
+    if _listens_upstream(nlp):
+        # This pipeline's NER shares a tok2vec we just left out: load it
+        # whole and only disable what NER doesn't read
+        nlp = ner_only(spacy.load(name))
+    return nlp
@@ -0,0 +1,192 @@
+import os
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from pshield.pipeline import DEFAULT_MODEL, load_pipeline
+from pshield.pshield import PromptShield
+
+# Options passed to PromptShield.protect_spans() for every text of a call
+Options = Dict[str, object]
+
+
+class Protected(NamedTuple):
+    """One text protected by a PromptShieldPool worker"""
+    index: int  # Position of the text in the input
+    text: str  # The protected text
+    mapping: Dict[str, str]  # Placeholder (as it appears in ``text``) -> original value
+
+    def restore(self, text: str) -> str:
+        """Restores this result's placeholders in ``text``, e.g. an LLM answer about it"""
+        return PromptShield.PLACEHOLDER_TOKEN.sub(lambda match: self.mapping.get(match.group(), match.group()), text)
+
+
+# The worker's PromptShield, set up once per process by _init_worker()
+_shield: Optional[PromptShield] = None
+# Shared by the workers of one pool, see _warm_up()
+_barrier = None
+# Pipeline handed to forked workers: loaded by the parent, inherited as is
+_inherited_nlp = None
+
+
+def _init_worker(barrier, nlp, model: str, profile: str, engine: str):
+    global _shield, _barrier
+    _barrier = barrier
+    if engine == "regex":
+        _shield = PromptShield(engine="regex")
+        return
+    nlp = nlp if nlp is not None else _inherited_nlp
+    _shield = PromptShield(nlp=nlp if nlp is not None else load_pipeline(model, profile))
+
+
+def _warm_up() -> int:
+    _shield.protect("John sent $50 to jane@example.com")
+    # Wait for the other workers, so no process can take two warm-ups
+    _barrier.wait()
+    return os.getpid()
+
+
+def _protect_chunk(chunk: List[Tuple[int, str]], options: Options) -> List[Protected]:
+    # Normalized values are kept in the text, there is nothing to restore
+    normalized = {entity_type for entity_type, rule in _shield.rules.items() if rule.get('mode') == 'normalize'}
+    results = []
+    for index, text in chunk:
+        # Every text gets its own placeholder numbering
+        _shield.placeholders_cache = {}
+        protected, spans = _shield.protect_spans(text, **options)
+        mapping = {span.placeholder: span.original for span in spans if span.entity_type not in normalized}
+        results.append(Protected(index, protected, mapping))
+    return results
+
+
+def _protect_one(text: str, options: Options) -> Protected:
+    return _protect_chunk([(0, text)], options)[0]
+
+
+class PromptShieldPool:
+    """
+    Protects texts in parallel on ``n_workers`` processes.
+
+    Every worker sets up its PromptShield once. Where processes are forked
+    (Linux), the spaCy pipeline is loaded once in the parent and the workers
+    inherit it; elsewhere each worker loads it on start. All workers are
+    started and warmed up before the constructor returns.
+
+    Each text gets its own placeholder numbering (as with
+    ``protect_batch(..., shared_placeholders=False)``); the mapping needed to
+    restore it comes back with the result.
+
+    Example:
+        with PromptShieldPool(4) as pool:
+            for result in pool.imap_unordered(texts, translate=False):
+                answer = call_llm(result.text)
+                print(result.index, result.restore(answer))
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, nlp=None, model: str = DEFAULT_MODEL,
+                 profile: str = "ner-only", engine: str = "spacy", start_method: Optional[str] = None):
+        """
+        Args:
+            n_workers: Number of worker processes (default: CPU count)
+            nlp: Pipeline to use instead of loading ``model``
+            model: spaCy model the workers load
+            profile: Loading profile, see load_pipeline()
+            engine: "spacy" or "regex" (no spaCy at all), see PromptShield
+            start_method: multiprocessing start method; defaults to "fork" where available
+        """
+        global _inherited_nlp
+
+        if engine not in PromptShield.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {PromptShield.ENGINES}")
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        if start_method is None:
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(start_method)
+
+        barrier = context.Barrier(self.n_workers)
+        initargs = (barrier, nlp, model, profile, engine)
+        if start_method == "fork" and engine == "spacy":
+            # Load once here; forked workers share it instead of loading their own
+            _inherited_nlp = nlp if nlp is not None else load_pipeline(model, profile)
+            initargs = (barrier, None, model, profile, engine)
+
+        self._executor = ProcessPoolExecutor(self.n_workers, mp_context=context,
+                                             initializer=_init_worker, initargs=initargs)
+        try:
+            # One per worker: each waits for the others, so they run on distinct processes
+            for future in [self._executor.submit(_warm_up) for _ in range(self.n_workers)]:
+                future.result()
+        finally:
+            _inherited_nlp = None
+
+    def submit(self, text: str, **options) -> 'Future[Protected]':
+        """
+        Protects one text in a worker.
+
+        Args:
+            text: The text to protect
+            **options: Passed to PromptShield.protect_spans() (translate, language, entities, exclude)
+
+        Returns:
+            A Future of the Protected result
+        """
+        return self._executor.submit(_protect_one, text, options)
+
+    def _chunks(self, texts: Iterable[str], chunksize: int) -> Iterator[List[Tuple[int, str]]]:
+        chunk = []
+        for item in enumerate(texts):
+            chunk.append(item)
+            if len(chunk) == chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def imap_unordered(self, texts: Iterable[str], chunksize: int = 8, **options) -> Iterator[Protected]:
+        """
+        Protects ``texts``, yielding results as soon as they are done.
+
+        ``texts`` is consumed lazily: at most a few chunks per worker are in
+        flight, so it can be a generator over a large corpus.
+
+        Args:
+            texts: The texts to protect
+            chunksize: Texts sent to a worker at once
+            **options: Passed to PromptShield.protect_spans() (translate, language, entities, exclude)
+
+        Yields:
+            Protected results in completion order; ``index`` gives the input position
+        """
+        chunks = self._chunks(texts, chunksize)
+        in_flight = set()
+        for chunk in chunks:
+            in_flight.add(self._executor.submit(_protect_chunk, chunk, options))
+            if len(in_flight) >= self.n_workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in wait(in_flight).done:
+            yield from future.result()
+
+    def map(self, texts: Iterable[str], chunksize: int = 8, **options) -> List[Protected]:
+        """
+        Protects ``texts`` and returns the results in input order.
+
+        Args:
+            texts: The texts to protect
+            chunksize: Texts sent to a worker at once
+            **options: Passed to PromptShield.protect_spans() (translate, language, entities, exclude)
+        """
+        results = list(self.imap_unordered(texts, chunksize, **options))
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def close(self):
+        """Stops the workers; pending work is finished first"""
+        self._executor.shutdown()
+
+    def __enter__(self) -> 'PromptShieldPool':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
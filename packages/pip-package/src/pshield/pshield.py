@@ -1,133 +1,608 @@
-import spacy
+import copy
+import itertools
 import re
-from langdetect import detect
-from deep_translator import GoogleTranslator
-from typing import Dict, List
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+from pshield.instrumentation import Instrumentation, RuleStats
+from pshield.matcher import compile_rules
+from pshield.pipeline import load_pipeline, ner_only, sentence_chunks
+from pshield.store import MappingStore, MemoryMappingStore, Session
+from pshield.translation import CachedTranslator, Translator, default_translator, detect_language
 
 PlaceholdersCache = Dict[str, Dict[str, Dict[str, str]]]
 Rules = Dict[str, Dict[str, List[str]]]
 
+# Text without a word starting with an upper-case letter has nothing for the
+# NER rules to find, so spaCy can be skipped. Anything beyond ASCII and
+# Latin-1 lower case counts as a hit: other scripts may have no case at all.
+NER_PREFILTER = re.compile(r'[A-Z](?<=\b.)|[\u00C0-\u00DE\u0100-\U0010FFFF]')
+
+
+class Span(NamedTuple):
+    """A replaced entity: where it was in the input and where its placeholder is in the output"""
+    start: int
+    end: int
+    original: str
+    entity_type: str
+    placeholder: str
+    output_start: int
+    output_end: int
+
+
+class DetectionTimeout(TimeoutError):
+    """Entity detection went over ``PromptShield.time_budget`` with ``budget_action="raise"``"""
+
+
+def _lap(timings: Dict[str, float], stage: str, since: float) -> float:
+    """Adds the time elapsed ``since`` to ``timings[stage]`` and returns the current time"""
+    now = time.perf_counter()
+    timings[stage] = timings.get(stage, 0.0) + now - since
+    return now
+
+
+class StreamRestorer:
+    """
+    Restores placeholders in text that arrives in pieces, e.g. streamed LLM output.
+
+    Text is passed through as soon as it can't be part of a placeholder; only
+    a trailing "[..." that could still turn into one is held back until the
+    next chunk decides it.
+    """
+
+    # A "[" that hasn't been closed yet at the end of the text received so far
+    OPEN_TOKEN = re.compile(r"\[[^\[\]\n]*\Z")
+
+    def __init__(self, shield: 'PromptShield'):
+        self.shield = shield
+        self.pending = ''
+        self._longest = 0
+        self._indexed = 0
+
+    def _longest_placeholder(self) -> int:
+        index = self.shield._get_restore_index()
+        if len(index) != self._indexed:
+            self._longest = max(map(len, index), default=0)
+            self._indexed = len(index)
+        # Translated placeholders can have a longer label than the English one
+        return self._longest + self.shield.translator.longest_label if self._longest else 0
+
+    def feed(self, chunk: str) -> str:
+        """
+        Adds a chunk of protected text.
+
+        Returns:
+            Restored text that is now final (possibly empty)
+        """
+        text = self.pending + chunk
+        match = self.OPEN_TOKEN.search(text)
+        # Hold back the open token only while it's shorter than the longest
+        # placeholder; anything longer can't become one
+        if match is not None and len(text) - match.start() < self._longest_placeholder():
+            self.pending = text[match.start():]
+            text = text[:match.start()]
+        else:
+            self.pending = ''
+        return self.shield.restore_all(text)
+
+    def flush(self) -> str:
+        """Returns whatever is still held back, at the end of the stream"""
+        text, self.pending = self.pending, ''
+        return self.shield.restore_all(text)
+
+
+def _common_prefix(a: str, b: str, block: int = 4096) -> int:
+    """Length of the common prefix of ``a`` and ``b``, compared a block at a time"""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n:
+        j = min(i + block, n)
+        if a[i:j] != b[i:j]:
+            break
+        i = j
+    else:
+        return n
+    # The first difference is in a[i:j]; binary search for it
+    lo, hi = i, j - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[i:mid] == b[i:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: str, b: str, limit: int, block: int = 4096) -> int:
+    """Length of the common suffix of ``a`` and ``b``, at most ``limit``"""
+    la, lb = len(a), len(b)
+    i = 0
+    while i < limit:
+        j = min(i + block, limit)
+        if a[la - j:la - i] != b[lb - j:lb - i]:
+            break
+        i = j
+    else:
+        return limit
+    lo, hi = i, j - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[la - mid:la - i] == b[lb - mid:lb - i]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _shift(span: Span, by: int, output_by: int) -> Span:
+    return Span(span.start + by, span.end + by, span.original, span.entity_type, span.placeholder,
+                span.output_start + output_by, span.output_end + output_by)
+
+
+class DocumentSpans(Sequence):
+    """
+    The spans of a ProtectedDocument, as returned by update(). A read-only
+    view valid until the next update(); ``list()`` it to keep it longer.
+    """
+
+    def __init__(self, before: List[Span], after: List[Span], length: int, output_length: int):
+        self._before = before
+        self._after = after
+        self._length = length
+        self._output_length = output_length
+
+    def __len__(self) -> int:
+        return len(self._before) + len(self._after)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('span index out of range')
+        if index < len(self._before):
+            return self._before[index]
+        return _shift(self._after[size - 1 - index], self._length, self._output_length)
+
+    def __iter__(self) -> Iterator[Span]:
+        yield from self._before
+        for span in reversed(self._after):
+            yield _shift(span, self._length, self._output_length)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f'DocumentSpans({list(self)!r})'
+
+
+# Approximate bytes a ProtectedDocument keeps per span (the strings are the session's)
+SPAN_BYTES = 200
+
+
+class ProtectedDocument:
+    """
+    Re-protects successive versions of one document, e.g. a file protected
+    again after every edit. Created by PromptShield.document().
+
+    Keeps the last text, its spans and its protected output. update() finds
+    the region where the new version differs, widens it by ``margin``
+    characters out to whole lines and past any entity it cuts, and runs
+    detection (the spaCy pass included) on that region only. Matches near
+    the region's edges can depend on the text beyond them, so while the
+    entities found near an edge differ from the ones there before, that edge
+    is moved further out and the region detected again. The rest of the
+    output and its placeholders are reused, so the cost follows the size of
+    the edit rather than of the document.
+    """
+
+    def __init__(self, shield: 'PromptShield', translate: bool = True, language: Optional[str] = None,
+                 entities: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None,
+                 margin: int = 200, session: Optional[Session] = None):
+        self.shield = shield
+        self.translate = translate
+        self.language = language
+        self.rules = shield.select_rules(entities, exclude)
+        self.margin = margin
+        self.text: Optional[str] = None
+        self.protected = ''
+        # The spans, split where the last update() was, like an editor's gap
+        # buffer: _before holds those up to there in order, _after the rest in
+        # reverse order with offsets relative to the end of the text and of the
+        # output, which edits before them don't change
+        self._before: List[Span] = []
+        self._before_ends: List[int] = []
+        self._after: List[Span] = []
+        # Distance from the end of each _after span to the end of the text, ascending
+        self._after_keys: List[int] = []
+        # (start, end) in the last text of the region the last update() re-detected
+        self.window = (0, 0)
+        # Language placeholders are translated to, detected on the whole
+        # document the first time there is something to translate
+        self._target_lang: Optional[str] = None
+        self._language_known = False
+        # The placeholders the output was made with; if the shield's change
+        # (reset, another session), the next update() starts over
+        self._cache: Optional[PlaceholdersCache] = None
+        # The session this document is kept in, which counts its memory
+        self._session = session
+        self.nbytes = 0
+
+    @property
+    def spans(self) -> DocumentSpans:
+        return DocumentSpans(self._before, self._after, len(self.text or ''), len(self.protected))
+
+    def _line_start(self, text: str, pos: int) -> int:
+        """The start of a line at most ``margin`` before ``pos``, else of the word at ``pos``"""
+        if pos <= 0:
+            return 0
+        cut = text.rfind('\n', max(0, pos - self.margin), pos)
+        if cut < 0:
+            cut = max(text.rfind(' ', 0, pos), text.rfind('\t', 0, pos), text.rfind('\n', 0, pos))
+        return cut + 1
+
+    def _line_end(self, text: str, pos: int) -> int:
+        """The end of a line at most ``margin`` after ``pos``, else of the word at ``pos``"""
+        if pos >= len(text):
+            return len(text)
+        cut = text.find('\n', pos, pos + self.margin)
+        if cut < 0:
+            cut = min((c for c in (text.find(' ', pos), text.find('\t', pos), text.find('\n', pos)) if c >= 0),
+                      default=len(text))
+        return cut
+
+    def _find(self, text: str, timings: Dict[str, float]):
+        """Entities in ``text`` (the whole document or a window of it)"""
+        doc = self.shield._parse(text, timings, self.rules)
+        return self.shield._detect(text, doc, self.rules, timings)
+
+    def _render(self, text: str, entities, timings: Dict[str, float]) -> Tuple[str, List[Span]]:
+        shield = self.shield
+        start = time.perf_counter()
+        if self.translate and not self._language_known and any(mode != 'normalize' for *_, mode in entities):
+            self._target_lang = shield._target_lang(self.text, entities, True, self.language)
+            self._language_known = True
+        start = _lap(timings, 'language', start)
+        start = shield._translate_labels(entities, self._target_lang, timings, start)
+        result = shield._render(text, entities, self._target_lang)
+        _lap(timings, 'render', start)
+        return result
+
+    def _move_gap(self, pos: int):
+        """Splits the spans so that _before holds those ending at or before ``pos``"""
+        length, output_length = len(self.text), len(self.protected)
+        before, after = self._before, self._after
+        i = bisect_right(self._before_ends, pos)
+        if i < len(before):
+            moved = before[i:]
+            del before[i:], self._before_ends[i:]
+            for span in reversed(moved):
+                after.append(_shift(span, -length, -output_length))
+                self._after_keys.append(length - span.end)
+            return
+        j = bisect_left(self._after_keys, length - pos)
+        if j < len(after):
+            moved = after[j:]
+            del after[j:], self._after_keys[j:]
+            for span in reversed(moved):
+                span = _shift(span, length, output_length)
+                before.append(span)
+                self._before_ends.append(span.end)
+
+    def _account(self):
+        """Counts the memory this document holds towards its session's"""
+        nbytes = (sys.getsizeof(self.text) + sys.getsizeof(self.protected)
+                  + SPAN_BYTES * (len(self._before) + len(self._after)))
+        if self._session is not None:
+            self._session.resize(nbytes - self.nbytes)
+        self.nbytes = nbytes
+
+    def update(self, text: str) -> Tuple[str, DocumentSpans]:
+        """
+        Protects the new version ``text`` of the document.
+
+        Returns:
+            The protected text and its Span records, like protect_spans()
+        """
+        shield = self.shield
+        started, timings = time.perf_counter(), shield._begin_call()
+        old = self.text
+        if old is None or self._cache is not shield.placeholders_cache:
+            self.text, self._cache = text, shield.placeholders_cache
+            self._target_lang, self._language_known = None, False
+            self.protected, spans = self._render(text, self._find(text, timings), timings)
+            self._before, self._before_ends = spans, [span.end for span in spans]
+            self._after, self._after_keys = [], []
+            self.window = (0, len(text))
+            self._account()
+            shield._end_call('protect_document', started, len(text))
+            return self.protected, self.spans
+        if old == text:
+            self.window = (0, 0)
+            shield._end_call('protect_document', started, 0)
+            return self.protected, self.spans
+
+        length, output_length = len(old), len(self.protected)
+        after, keys = self._after, self._after_keys
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+        delta = len(text) - len(old)
+        # The edit is text[prefix:edit_end]; before and after it the old offsets
+        # hold, shifted by delta after it
+        edit_end = len(text) - suffix
+        low, high = prefix - self.margin, edit_end + self.margin
+        # Characters next to each edge of the window whose entities must come
+        # out as before, and how far an edge moves out when they don't
+        edge, step = max(self.margin // 2, 32), max(self.margin, 64)
+        while True:
+            start = self._line_start(text, low)
+            old_end = self._line_end(text, high) - delta
+            # Widen the window over the old spans it cuts or that end (start)
+            # less than ``edge`` before it, which text inside it may extend
+            self._move_gap(start - edge)
+            if after and after[-1].start + length < start:
+                start = after[-1].start + length
+            j = bisect_left(keys, length - old_end)
+            if j and after[j - 1].start + length < old_end + edge:
+                old_end = after[j - 1].end + length
+                j -= 1
+            end = old_end + delta
+            entities = self._find(text[start:end], timings)
+
+            # If the entities near an edge differ from the ones found there
+            # before, the text beyond the edge matters: move it out and retry
+            found = [(s + start, e + start, t) for s, e, _, t, _ in itertools.takewhile(
+                lambda entity: entity[0] < edge, entities)]
+            kept = [(span.start + length, span.end + length, span.entity_type) for span in itertools.takewhile(
+                lambda span: span.start + length < start + edge, reversed(after[j:]))]
+            left_moved = start > 0 and found != kept
+            found = [(s + start, e + start, t) for s, e, _, t, _ in itertools.takewhile(
+                lambda entity: entity[1] > end - start - edge, reversed(entities))]
+            kept = [(span.start + length + delta, span.end + length + delta, span.entity_type)
+                    for span in itertools.takewhile(lambda span: span.end + length + delta > end - edge, after[j:])]
+            right_moved = end < len(text) and found != kept
+            if not (left_moved or right_moved):
+                break
+            if left_moved:
+                low = start - step
+            if right_moved:
+                high = end + step
+            step *= 2
+
+        # Splice the window's output in place of the old spans' and the text between them
+        output_start = start + (self._before[-1].output_end - self._before[-1].end if self._before else 0)
+        output_end = old_end + (output_length - length + (after[j - 1].output_start - after[j - 1].start)
+                                if j else output_length - length)
+        del after[j:], keys[j:]
+        self.text = text
+        rendered, window_spans = self._render(text[start:end], entities, timings)
+        self.protected = self.protected[:output_start] + rendered + self.protected[output_end:]
+        for span in window_spans:
+            span = _shift(span, start, output_start)
+            self._before.append(span)
+            self._before_ends.append(span.end)
+        self.window = (start, end)
+        self._account()
+        shield._end_call('protect_document', started, end - start)
+        return self.protected, self.spans
+
 
 class PromptShield:
     PLACEHOLDER_PATTERN = re.compile(r"\[(\w+)_\d+\]")
+    # Anything that looks like a placeholder, translated ones included: their
+    # labels may contain spaces, hyphens or accents ("[CORREO ELECTRÓNICO_1]")
+    PLACEHOLDER_TOKEN = re.compile(r"\[([^\[\]\n]+)_(\d+)\]")
+
+    ENGINES = ("spacy", "regex")
+    # What happens when detecting entities in a text takes longer than time_budget
+    BUDGET_ACTIONS = ("flag", "skip", "raise")
 
-    def __init__(self, nlp=None):
-        self.ner = nlp or spacy.load("en_core_web_sm")
+    def __init__(self, nlp=None, translator: Optional[Translator] = None, engine: str = "spacy",
+                 profile: Optional[str] = None, store: Optional[MappingStore] = None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {self.ENGINES}")
+        if engine == "regex":
+            # Patterns only: spaCy is never imported and NER detectors are skipped
+            self.ner = None
+        elif nlp is None:
+            self.ner = load_pipeline(profile=profile or "ner-only")
+        elif profile == "ner-only":
+            self.ner = ner_only(nlp)
+        else:
+            self.ner = nlp
+        if translator is None:
+            translator = default_translator
+        elif not isinstance(translator, CachedTranslator):
+            translator = CachedTranslator(translator)
+        self.translator: CachedTranslator = translator
         self.placeholders_cache: PlaceholdersCache = {}
+        # Seconds spent per stage ('prefilter', 'ner', 'rules', 'resolve', 'language',
+        # 'translate', 'render') by the last protect call, summed over texts/windows for batches
+        # and streams
+        self.timings: Dict[str, float] = {}
+        # Texts this doesn't match skip the spaCy pass; None always runs it
+        self.ner_prefilter: Optional[Pattern] = NER_PREFILTER
+        # Texts longer than this many characters go through spaCy in chunks of
+        # whole sentences, and chunks the prefilter rules out are only
+        # tokenized; None parses every text in one piece
+        self.sentence_chunk_size: Optional[int] = None
+        self._prefilter_counts = {'checked': 0, 'skipped': 0, 'seconds': 0.0, 'skipped_chars': 0,
+                                  'ner_chars': 0, 'ner_seconds': 0.0}
+        # placeholder -> original, kept in step with placeholders_cache
+        self._restore_index: Dict[str, str] = {}
+        self._indexed_cache: Optional[PlaceholdersCache] = self.placeholders_cache
+        # Per-conversation placeholders for for_session(); shared by its views
+        self.store: MappingStore = store if store is not None else MemoryMappingStore()
+        # The session this instance is a view of, if any
+        self._session: Optional[Session] = None
+        # Opt-in call/stage/rule metrics, see instrument()
+        self.instrumentation: Optional[Instrumentation] = None
+        # Per-rule stats of the running call, collected only when instrumented
+        self._rule_stats: Optional[RuleStats] = None
+        # Seconds entity detection may take per text (per window for streams);
+        # None for no limit. Past it, budget_action decides: "flag" only sets
+        # over_budget, "skip" also runs no further rules (the entities found so
+        # far are still replaced) and "raise" raises DetectionTimeout
+        self.time_budget: Optional[float] = None
+        self.budget_action: str = "flag"
+        # Whether the last call went over time_budget, and the rules it skipped
+        self.over_budget = False
+        self.skipped_rules: List[str] = []
 
         self.rules: Rules = {
             'mem': {
                 'patterns': [
                     r'\b\d+(?:\.\d+)?\s*(?:B|KB|K|MB|M|GB|G|TB|T)\b'
-                ]
+                ],
+                'trigger_class': r'\d'
             },
             'cvv': {
                 'patterns': [
                     r'\b(?:CVV|CVC)\s*[:\-]?\s*\d{3,4}\b',
-                ]
+                ],
+                'triggers': ['CVV', 'CVC']
             },
             'exp': {
                 'patterns': [
                     r'\b(?:exp|expiry|expires)\s*[:\-]?\s*(0[1-9]|1[0-2])[\/\-](\d{2}|\d{4})\b'
-                ]
+                ],
+                'triggers': ['exp']
             },
             'card': {
                 'patterns': [
                     r'\b(?:\d{4}[- ]\d{4}[- ]\d{4}[- ]\d{4}|\d{16})\b'
-                ]
+                ],
+                'trigger_class': r'\d'
             },
             'date': {
                 'patterns': [
                     r'\b(0?[1-9]|[12][0-9]|3[01])[\/\-](0?[1-9]|1[0-2])[\/\-]\d{4}\b',
                     r'\d{4}[\/\-](?:0?[1-9]|1[0-2])[\/\-](?:0?[1-9]|[12][0-9]|3[01])',
                     r'\b(0?[1-9]|[12][0-9]|3[01])(st|nd|rd|th)\b',
-                ]
+                ],
+                'trigger_class': r'\d'
             },
             
             'email': {
                 'patterns': [
-                    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-                ]
+                    # \b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b tried only where
+                    # re would first try it in a run of local-part characters:
+                    # the run's first word boundary, or right after a previous
+                    # address (whose local part, as RFC 5321 says, is at most 64
+                    # characters). Same matches, in linear instead of quadratic time.
+                    r'(?:(?<![\w.%+-])[.%+-]*|(?<=[^\WA-Za-z0-9_])[A-Za-z0-9_]*'
+                    r'|(?<=[A-Za-z|])(?=[A-Za-z0-9._%+-]{1,64}@))'
+                    r'(?P<entity>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'
+                ],
+                'triggers': ['@']
             },
             'url': {
                 'patterns': [
                     r'https?://[^\s<>"{}|\\^`\[\]]+',
                     r'www\.[^\s<>"{}|\\^`\[\]]+',
-                ]
+                ],
+                'triggers': ['://', 'www.']
             },
             
             'ip': {
                 'patterns': [
                     r'\b(?:IP|ip)\s*[:\-]?\s*((?:\d{1,3}\.){3}\d{1,3})\b',
                     r'\b((?:\d{1,3}\.){3}\d{1,3})\b'
-                ]
+                ],
+                'triggers': ['.'],
+                'trigger_class': r'\d'
             },
             'phone': {
                 'patterns': [
                     r'\+?\d[\d\s\-\(\)]{8,}\d'
-                ]
+                ],
+                'trigger_class': r'\d'
             },
             'amount': {
                 'patterns': [
                     r'[\$\€\£\₽\¥]\s?\d+(?:,\d{3})*(?:\.\d{1,2})?',
-                    r'\d+(?:,\d{3})*(?:\.\d{1,2})?\s*(?:USD|EUR|GBP|JPY|AUD|CAD|RUB|CNY|dollars?)',
+                    # (?<!\d): a match inside a digit run implies one at its start,
+                    # so only try there (long digit runs were quadratic)
+                    r'(?<!\d)\d+(?:,\d{3})*(?:\.\d{1,2})?\s*(?:USD|EUR|GBP|JPY|AUD|CAD|RUB|CNY|dollars?)',
                     r'(?:USD|EUR|GBP|JPY|AUD|CAD|RUB|CNY)\s+\d+(?:,\d{3})*(?:\.\d{1,2})?',
-                ]
+                ],
+                'triggers': ['$', '€', '£', '₽', '¥', 'USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'RUB', 'CNY', 'dollar'],
+                'trigger_class': r'\d'
             },
            
             'name': {
-                'custom': lambda text: {
+                'ner': lambda doc: {
                     (ent.text, ent.start_char, ent.end_char)
-                    for ent in self.ner(text).ents
+                    for ent in doc.ents
                     if ent.label_ in ("PERSON", "LOC") and ent.text.lower() not in ['blockchain']
                 },
                 'patterns': [
                     r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',  # Two capitalized words
                     r'\b[A-Z][a-z]+ [A-Z][\'\u2019][A-Z][a-z]+\b',  # Names with apostrophe like O'Connell
                     r'\b[A-Z][\'\u2019][A-Z][a-z]+\b',  # Single names with apostrophe like O'Connell
-                ]
+                ],
+                'trigger_class': r'[A-Z]'
             },
             'place': {
-                'custom': lambda text: {
+                'ner': lambda doc: {
                     (ent.text, ent.start_char, ent.end_char)
-                    for ent in self.ner(text).ents
+                    for ent in doc.ents
                     if ent.label_ in ("GPE", "LOC")
                 }
             },
             'jwt': {
                 'patterns': [
-                    r'eyJ[A-Za-z0-9_-]*\.eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+',
-                    r'eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+',
-                ]
+                    # From the first "eyJ" of each run only: it matches whenever a
+                    # later one would
+                    r'(?<![A-Za-z0-9_-])(?:(?!eyJ)[A-Za-z0-9_-])*'
+                    r'(?P<entity>eyJ[A-Za-z0-9_-]*\.eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+)',
+                    r'(?<![A-Za-z0-9_-])(?:(?!eyJ)[A-Za-z0-9_-])*'
+                    r'(?P<entity>eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+)',
+                ],
+                'triggers': ['eyJ']
             },
             'btc_address': {
                 'patterns': [
                     r'\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b',
                     r'\bbc1[a-z0-9]{39,87}\b',
-                ]
+                ],
+                'trigger_class': r'[13]'
             },
             'eth_address': {
                 'patterns': [
                     r'\b0x[a-fA-F0-9]{40}\b',
-                ]
+                ],
+                'triggers': ['0x']
             },
             'username': {
                 'patterns': [
                     r'@[A-Za-z0-9_]{1,15}\b',
                     r'u/[A-Za-z0-9_-]{3,20}\b',
-                ]
+                ],
+                'triggers': ['@', 'u/']
             },
              'alnum_code': {
                 'patterns': [
-                    r'\b(?=[A-Za-z0-9\-]*[A-Za-z])(?=[A-Za-z0-9\-]*\d)[A-Za-z0-9\-]+\b'
+                    # Tried at the first word boundary of each run of code
+                    # characters only, like the email pattern
+                    r'(?:(?<![\w-])-*|(?<=[^\WA-Za-z0-9])[A-Za-z0-9]*)'
+                    r'(?P<entity>\b(?=[A-Za-z0-9\-]*[A-Za-z])(?=[A-Za-z0-9\-]*\d)[A-Za-z0-9\-]+\b)'
                 ],
+                'trigger_class': r'\d',
                 'mode': 'placeholder'
             },
             'coord': {
                 'patterns': [
                     r'-?\d{1,3}\.\d{3,},\s*-?\d{1,3}\.\d{3,}',
                     r'(?:lat|latitude)[:\s]*-?\d{1,3}\.\d+[,\s]+(?:lon|longitude|lng)[:\s]*-?\d{1,3}\.\d+',
-                ]
+                ],
+                'triggers': ['.'],
+                'trigger_class': r'\d'
             }
         }
 
@@ -145,9 +620,19 @@ class PromptShield:
             self.placeholders_cache[entity_type]['count'] += 1
             idx = self.placeholders_cache[entity_type]['count']
             placeholders[entity_value] = f"[{entity_type.upper()}_{idx}]"
+            self._get_restore_index()[placeholders[entity_value]] = entity_value
+            if self._session is not None and self.placeholders_cache is self._session.placeholders_cache:
+                self._session.account(entity_value, placeholders[entity_value])
 
         return placeholders[entity_value]
 
+    def _get_restore_index(self) -> Dict[str, str]:
+        """Placeholder -> original lookup, rebuilt only if placeholders_cache was replaced"""
+        if self._indexed_cache is not self.placeholders_cache:
+            self._restore_index = self.get_mapping()
+            self._indexed_cache = self.placeholders_cache
+        return self._restore_index
+
     def _normalize_alnum(self, value: str) -> str:
         return ''.join(
             'A' if c.isalpha() else
@@ -156,97 +641,515 @@ class PromptShield:
             for c in value
         )
 
-    def _replace_pattern(self, text: str, pattern: str, entity_type: str, mode: str = "placeholder") -> str:
-        matches = []
-        for match in re.finditer(pattern, text):
-            matches.append((match.start(), match.end(), match.group()))
+    def _translate_placeholder(self, placeholder: str, target_lang: str) -> str:
+        """Translates the entity type of a "[TYPE_N]" placeholder"""
+        match = self.PLACEHOLDER_PATTERN.fullmatch(placeholder)
+        if not match:
+            return placeholder
+        entity_type = match.group(1)
+        index = placeholder[len(entity_type) + 2:-1]
+        return f"[{self.translator.translate(entity_type, target_lang)}_{index}]"
+
+    def _lookup_placeholder(self, placeholder: str, index: Dict[str, str]) -> Optional[str]:
+        """Original value behind a placeholder, translated or not; None if unknown"""
+        original = index.get(placeholder)
+        if original is None:
+            match = self.PLACEHOLDER_TOKEN.fullmatch(placeholder)
+            if match:
+                entity_type = self.translator.untranslate(match.group(1))
+                if entity_type is not None:
+                    original = index.get(f"[{entity_type}_{match.group(2)}]")
+        return original
+
+    def _translate_labels(self, entities, target_lang: Optional[str], timings: Dict[str, float],
+                          since: float) -> float:
+        """
+        Looks up the translated label of every entity type in ``entities`` as
+        the 'translate' stage, so _render() finds them in the translator's cache.
+
+        Returns:
+            The current time, or ``since`` if there is nothing to translate
+        """
+        if target_lang is None:
+            return since
+        for entity_type in {entity_type for *_, entity_type, mode in entities if mode != 'normalize'}:
+            self.translator.translate(entity_type.upper(), target_lang)
+        return _lap(timings, 'translate', since)
+
+    def _render(self, text: str, entities, target_lang: Optional[str] = None) -> Tuple[str, List[Span]]:
+        """
+        Builds the protected text in a single left-to-right pass.
 
-        matches.sort(reverse=True, key=lambda x: x[0])
+        Args:
+            text: The original text
+            entities: Non-overlapping (start, end, entity_value, entity_type, mode), sorted by start
+            target_lang: Language to translate placeholders to, None to keep them in English
 
-        for start, end, entity_value in matches:
+        Returns:
+            The protected text and one Span per replaced entity
+        """
+        parts = []
+        spans = []
+        last = 0
+        output_pos = 0
+        stats = self._rule_stats
+
+        for start, end, entity_value, entity_type, mode in entities:
+            if stats is not None:
+                stats.setdefault(entity_type, [0.0, 0, 0])[2] += 1
             if mode == "normalize":
                 replacement = self._normalize_alnum(entity_value)
             else:
                 replacement = self._get_placeholder(entity_value, entity_type)
+                if target_lang is not None:
+                    replacement = self._translate_placeholder(replacement, target_lang)
 
-            text = text[:start] + replacement + text[end:]
+            parts.append(text[last:start])
+            output_pos += start - last
+            parts.append(replacement)
+            spans.append(Span(start, end, entity_value, entity_type, replacement,
+                              output_pos, output_pos + len(replacement)))
+            output_pos += len(replacement)
+            last = end
 
-        return text
+        parts.append(text[last:])
+        return ''.join(parts), spans
 
-    def _replace_custom(self, text: str, custom_func, entity_type: str) -> str:
-        found_entities = list(custom_func(text))
-        found_entities.sort(reverse=True, key=lambda x: x[1])
+    def _begin_call(self) -> Dict[str, float]:
+        """Resets the per-call timings (and rule stats when instrumented) and returns the timings"""
+        self.timings = {}
+        self._rule_stats = {} if self.instrumentation is not None else None
+        self.over_budget = False
+        self.skipped_rules = []
+        return self.timings
 
-        for entity_value, start, end in found_entities:
-            placeholder = self._get_placeholder(entity_value, entity_type)
-            text = text[:start] + placeholder + text[end:]
+    def _end_call(self, call: str, started: float, chars: int):
+        if self.instrumentation is not None:
+            self.instrumentation.record(call, time.perf_counter() - started, chars, self.timings, self._rule_stats)
 
-        return text
+    def _uses_ner(self, rules: Optional[Rules] = None) -> bool:
+        rules = self.rules if rules is None else rules
+        return self.ner is not None and any('ner' in rule for rule in rules.values())
+
+    def _ner_wanted(self, text: str, timings: Dict[str, float], rules: Rules) -> bool:
+        """Whether ``text`` needs the spaCy pass: some rule uses NER and the prefilter matches"""
+        if not self._uses_ner(rules):
+            return False
+        if self.ner_prefilter is None:
+            return True
+        start = time.perf_counter()
+        wanted = self.ner_prefilter.search(text) is not None
+        counts = self._prefilter_counts
+        counts['checked'] += 1
+        counts['seconds'] += _lap(timings, 'prefilter', start) - start
+        if not wanted:
+            counts['skipped'] += 1
+            counts['skipped_chars'] += len(text)
+        return wanted
+
+    def _parse(self, text: str, timings: Dict[str, float], rules: Rules):
+        """Runs spaCy on ``text`` unless no NER rule could match; returns the Doc or None"""
+        if not self._ner_wanted(text, timings, rules):
+            return None
+        start = time.perf_counter()
+        size = self.sentence_chunk_size
+        if size is None or len(text) <= size:
+            doc = self.ner(text)
+            self._count_ner(len(text), _lap(timings, 'ner', start) - start)
+        else:
+            doc = self._parse_sentences(text, size, timings, start)
+        return doc
+
+    def _parse_sentences(self, text: str, size: int, timings: Dict[str, float], start: float):
+        """spaCy over ``text`` in chunks of whole sentences (see sentence_chunk_size), joined back into one Doc"""
+        from spacy.tokens import Doc
+
+        chunks = [text[chunk_start:chunk_end] for chunk_start, chunk_end in sentence_chunks(text, size)]
+        prefilter = self.ner_prefilter
+        wanted = [prefilter is None or prefilter.search(chunk) is not None for chunk in chunks]
+        parsed = iter(self.ner.pipe([chunk for chunk, parse in zip(chunks, wanted) if parse]))
+        doc = Doc.from_docs([next(parsed) if parse else self.ner.make_doc(chunk)
+                             for chunk, parse in zip(chunks, wanted)], ensure_whitespace=False)
+        skipped = sum(len(chunk) for chunk, parse in zip(chunks, wanted) if not parse)
+        self._prefilter_counts['skipped_chars'] += skipped
+        self._count_ner(len(text) - skipped, _lap(timings, 'ner', start) - start)
+        return doc
+
+    def _count_ner(self, chars: int, seconds: float):
+        self._prefilter_counts['ner_chars'] += chars
+        self._prefilter_counts['ner_seconds'] += seconds
+
+    def _spans_mapping(self, spans: List[Span]) -> Dict[str, str]:
+        """Placeholder -> original value for ``spans``, keyed by the placeholders as they appear in the text"""
+        mapping = {}
+        for span in spans:
+            # Normalized values have no placeholder to restore
+            if span.original in self.placeholders_cache.get(span.entity_type, {}).get('placeholders', {}):
+                mapping[span.placeholder] = span.original
+        return mapping
+
+    def _protect_spans(self, text: str, translate: bool, doc, language: Optional[str],
+                       timings: Dict[str, float], rules: Rules) -> Tuple[str, List[Span]]:
+        """protect_spans() on an already parsed ``doc`` (None when no rule uses NER)"""
+        entities = self._detect(text, doc, rules, timings)
+        start = time.perf_counter()
+        target_lang = self._target_lang(text, entities, translate, language)
+        start = _lap(timings, 'language', start)
+        start = self._translate_labels(entities, target_lang, timings, start)
+        result = self._render(text, entities, target_lang)
+        _lap(timings, 'render', start)
+        return result
+
+    def _target_lang(self, text: str, entities, translate: bool, language: Optional[str]) -> Optional[str]:
+        """
+        Language to translate placeholders to, None to keep them in English.
+        Only detected when translating and there is a placeholder to translate.
+        """
+        if not translate or all(mode == 'normalize' for *_, mode in entities):
+            return None
+        lang = language or detect_language(text)
+        return lang if lang != "en" else None
+
+    def _detect(self, text: str, doc, rules: Rules,
+                timings: Dict[str, float]) -> List[Tuple[int, int, str, str, str]]:
+        """
+        Non-overlapping entities in ``text`` as (start, end, entity_value, entity_type, mode)
+
+        Raises:
+            DetectionTimeout: If it took longer than ``time_budget`` and ``budget_action`` is "raise"
+        """
+        stats = self._rule_stats
+        began = time.perf_counter()
+        budget = self.time_budget
+        if self.budget_action not in self.BUDGET_ACTIONS:
+            raise ValueError(f"Unknown budget_action {self.budget_action!r}, expected one of {self.BUDGET_ACTIONS}")
+        # Checked before each rule; a running pattern or spaCy pass isn't interrupted
+        deadline = began + budget if budget is not None and self.budget_action != "flag" else None
+        # Collect NER, custom and dictionary entities from the ORIGINAL text; regex rules
+        # are matched by the compiled rule set while resolving overlaps
+        found_entities = []  # List of (start, end, entity_value, entity_type, mode, priority)
+
+        for rule_index, (entity_type, rule) in enumerate(rules.items()):
+            mode = rule.get('mode', 'placeholder')
+            if deadline is not None and time.perf_counter() > deadline:
+                if entity_type not in self.skipped_rules:
+                    self.skipped_rules.append(entity_type)
+                continue
+            rule_start, found = time.perf_counter() if stats is not None else 0.0, len(found_entities)
+            if 'ner' in rule and doc is not None:
+                # NER-based detection
+                for entity_value, start, end in rule['ner'](doc):
+                    found_entities.append((start, end, entity_value, entity_type, mode, (rule_index, 0)))
+            if 'custom' in rule:
+                # Arbitrary text-based detection
+                for entity_value, start, end in rule['custom'](text):
+                    found_entities.append((start, end, entity_value, entity_type, mode, (rule_index, 0)))
+            if 'dictionary' in rule:
+                # Fixed list of terms, see Dictionary
+                for entity_value, start, end in rule['dictionary'].find(text):
+                    found_entities.append((start, end, entity_value, entity_type, mode, (rule_index, 0)))
+            if stats is not None and ('ner' in rule or 'custom' in rule or 'dictionary' in rule):
+                rule_stats = stats.setdefault(entity_type, [0.0, 0, 0])
+                rule_stats[0] += time.perf_counter() - rule_start
+                rule_stats[1] += len(found_entities) - found
 
-    def _translate_placeholders(self, text: str, target_lang: str) -> str:
-        def repl(match):
-            placeholder = match.group(0)
-            entity_type = match.group(1)
-            try:
-                translated = GoogleTranslator(source='en', target=target_lang).translate(entity_type.lower())
-                return f"[{translated.upper()}_{placeholder.split('_')[1]}]"
-            except:
-                return placeholder
+        matcher = compile_rules(rules)
+        candidates = matcher.candidates(text, found_entities, stats, deadline, self.skipped_rules)
+        start = _lap(timings, 'rules', began)
+        if budget is not None and start - began > budget:
+            self.over_budget = True
+            if self.budget_action == "raise":
+                raise DetectionTimeout(f"Detecting entities took {start - began:.3f}s, over the "
+                                       f"{budget}s budget; skipped rules: {self.skipped_rules}")
+        # Leftmost-longest, non-overlapping entities (earlier rules win ties)
+        entities = matcher.select(candidates)
+        _lap(timings, 'resolve', start)
+        return entities
 
-        return self.PLACEHOLDER_PATTERN.sub(repl, text)
+    def _stream_cut(self, window: str, entities, overlap: int) -> int:
+        """
+        Position up to which a stream window can be emitted: before the
+        overlap tail, on whitespace, and never inside an entity.
+        """
+        limit = len(window) - overlap
+        cut = max(window.rfind(' ', 0, limit), window.rfind('\n', 0, limit)) + 1
+        if cut <= 0:
+            cut = limit
+        for start, end, *_ in entities:
+            if start < cut < end:
+                # An entity at the start of the window can't be held back (the
+                # next window would begin with it again): emit it whole, masked.
+                # One reaching the end of the window is masked as far as it got
+                cut = start if start > 0 else end
+                break
+        return cut
 
     # =========================
     # Public API
     # =========================
 
-    def protect(self, text: str, translate: bool = True) -> str:
+    def for_session(self, session_id: Optional[Hashable]) -> 'PromptShield':
+        """
+        Returns a view of this instance that numbers and restores placeholders
+        for one conversation only, kept in ``store`` under ``session_id``.
+
+        The view shares the pipeline, rules and translator, so it's cheap to
+        make per request: one warm instance can serve many conversations while
+        the store bounds how many mappings are kept. Use a session from one
+        call at a time: views of the same session share ``view.lock``, to hold
+        around calls that may overlap (e.g. on a threaded server). ``None``
+        gives a fresh session that isn't stored.
+
+        Example:
+            view = shield.for_session(conversation_id)
+            protected = view.protect(message)
+            answer = view.restore_all(call_llm(protected))
+        """
+        session = Session() if session_id is None else self.store.get(session_id)
+        view = copy.copy(self)
+        view.placeholders_cache = view._indexed_cache = session.placeholders_cache
+        view._restore_index = session.restore_index
+        view.timings = {}
+        view._session = session
+        view.lock = session.lock
+        return view
+
+    def end_session(self, session_id: Hashable) -> bool:
+        """Drops a session's placeholders from ``store``; returns whether it was there"""
+        return self.store.drop(session_id)
+
+    def instrument(self, instrumentation: Optional[Instrumentation] = None) -> Instrumentation:
+        """
+        Starts recording call, stage and per-rule timings and match counts.
+
+        Adds a little overhead per rule and call, so it's off by default. Session
+        views made afterwards record into the same Instrumentation.
+
+        Args:
+            instrumentation: Where to record, e.g. one shared by several instances;
+                a new one by default
+
+        Returns:
+            The Instrumentation, for snapshot(), add_callback() and prometheus()
+        """
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        return self.instrumentation
+
+    def select_rules(self, entities: Optional[Iterable[str]] = None,
+                     exclude: Optional[Iterable[str]] = None) -> Rules:
+        """
+        Returns the rules a protect call with these ``entities``/``exclude`` runs, in rule order.
+
+        Raises:
+            ValueError: If an entity type isn't a key of ``rules``
+        """
+        if entities is None and not exclude:
+            return self.rules
+        selected = set(self.rules) if entities is None else set(entities)
+        excluded = set(exclude or ())
+        unknown = (selected | excluded) - set(self.rules)
+        if unknown:
+            raise ValueError(f"Unknown entity types: {', '.join(sorted(unknown))}")
+        return {
+            entity_type: rule for entity_type, rule in self.rules.items()
+            if entity_type in selected and entity_type not in excluded
+        }
+
+    def protect(self, text: str, translate: bool = True, language: Optional[str] = None,
+                entities: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None) -> str:
+        """
+        Replaces sensitive entities in the text with placeholders.
+
+        Args:
+            text: The text to protect
+            translate: Translate placeholders to the detected language of the text
+            language: Language of the text (e.g. "fr"); skips detection when given
+            entities: Only detect these entity types (keys of ``rules``), e.g. {"email", "card"}
+            exclude: Entity types not to detect
+
+        Returns:
+            The protected text
+
+        Raises:
+            DetectionTimeout: If detection goes over ``time_budget`` and ``budget_action`` is "raise"
+        """
+        return self.protect_spans(text, translate, language, entities, exclude)[0]
+
+    def protect_spans(self, text: str, translate: bool = True, language: Optional[str] = None,
+                      entities: Optional[Iterable[str]] = None,
+                      exclude: Optional[Iterable[str]] = None) -> Tuple[str, List[Span]]:
+        """
+        Same as protect(), but also returns where each entity was replaced.
+
+        Args:
+            text: The text to protect
+            translate: Translate placeholders to the detected language of the text
+            language: Language of the text (e.g. "fr"); skips detection when given
+            entities: Only detect these entity types (keys of ``rules``), e.g. {"email", "card"}
+            exclude: Entity types not to detect
+
+        Returns:
+            The protected text and a list of Span records, ordered by position.
+            ``start``/``end`` index into ``text``, ``output_start``/``output_end``
+            into the protected text.
+        """
+        rules = self.select_rules(entities, exclude)
+        started, timings = time.perf_counter(), self._begin_call()
+        # Run the spaCy pipeline once; every NER-backed rule reads the same Doc
+        doc = self._parse(text, timings, rules)
+        result = self._protect_spans(text, translate, doc, language, timings, rules)
+        self._end_call('protect', started, len(text))
+        return result
+
+    def protect_batch(self, texts: Iterable[str], translate: bool = True, batch_size: int = 64,
+                      n_process: int = 1, shared_placeholders: bool = True, language: Optional[str] = None,
+                      entities: Optional[Iterable[str]] = None,
+                      exclude: Optional[Iterable[str]] = None) -> List[Tuple[str, Dict[str, str]]]:
+        """
+        Protects many texts, running them through spaCy with ``nlp.pipe``.
+
+        Args:
+            texts: The texts to protect
+            translate: Translate placeholders to the detected language of each text
+            batch_size: Number of texts spaCy processes per batch
+            n_process: Number of processes spaCy uses (1 = in process)
+            shared_placeholders: Number placeholders across all texts and record them
+                in this instance (like repeated protect() calls). If False, every text
+                gets its own numbering and this instance's placeholders are left untouched.
+            language: Language of all the texts; skips detection when given
+            entities: Only detect these entity types (keys of ``rules``), e.g. {"email", "card"}
+            exclude: Entity types not to detect
+
+        Returns:
+            A (protected_text, mapping) pair per input text, in input order. The
+            mapping only contains the placeholders used in that text.
+        """
+        texts = list(texts)
+        rules = self.select_rules(entities, exclude)
+        started, timings = time.perf_counter(), self._begin_call()
+        wanted = [self._ner_wanted(text, timings, rules) for text in texts]
+        # Texts over sentence_chunk_size are parsed in chunks by _parse_sentences() instead
+        size = self.sentence_chunk_size
+        piped = [parse and (size is None or len(text) <= size) for text, parse in zip(texts, wanted)]
+        docs = iter(self.ner.pipe([text for text, pipe in zip(texts, piped) if pipe],
+                                  batch_size=batch_size, n_process=n_process)) if any(piped) else None
+
+        results = []
+        # Put back as they were: on a session view they are the session's own
+        placeholders_cache, restore_index = self.placeholders_cache, (self._restore_index, self._indexed_cache)
         try:
-            lang = detect(text)
-        except:
-            lang = "en"
+            for text, parse, pipe in zip(texts, wanted, piped):
+                doc = None
+                if pipe:
+                    start = time.perf_counter()
+                    doc = next(docs)
+                    self._count_ner(len(text), _lap(timings, 'ner', start) - start)
+                elif parse:
+                    doc = self._parse_sentences(text, size, timings, time.perf_counter())
+                if not shared_placeholders:
+                    self.placeholders_cache = {}
+                protected, spans = self._protect_spans(text, translate, doc, language, timings, rules)
+                results.append((protected, self._spans_mapping(spans)))
+        finally:
+            self.placeholders_cache = placeholders_cache
+            self._restore_index, self._indexed_cache = restore_index
 
-        # Collect all entities from the ORIGINAL text first
-        all_entities = []  # List of (start, end, entity_value, entity_type, mode)
+        self._end_call('protect_batch', started, sum(len(text) for text in texts))
+        return results
 
-        for entity_type, rule in self.rules.items():
-            mode = rule.get('mode', 'placeholder')
-            if 'custom' in rule:
-                # NER-based detection
-                found = rule['custom'](text)
-                for entity_value, start, end in found:
-                    all_entities.append((start, end, entity_value, entity_type, mode))
-            # Regex-based detection (always check patterns if present)
-            for pattern in rule.get('patterns', []):
-                for match in re.finditer(pattern, text):
-                    all_entities.append((match.start(), match.end(), match.group(), entity_type, mode))
-
-        # Remove overlapping entities (keep the first one found for each position)
-        all_entities.sort(key=lambda x: (x[0], -x[1]))  # Sort by start, then by longest
-        non_overlapping = []
-        last_end = -1
-        for start, end, entity_value, entity_type, mode in all_entities:
-            if start >= last_end:
-                non_overlapping.append((start, end, entity_value, entity_type, mode))
-                last_end = end
-
-        # Pre-assign placeholders in forward order (ascending by position)
-        for start, end, entity_value, entity_type, mode in non_overlapping:
-            if mode != "normalize":
-                self._get_placeholder(entity_value, entity_type)
-
-        # Apply replacements in reverse order to preserve indices
-        non_overlapping.sort(reverse=True, key=lambda x: x[0])
-        for start, end, entity_value, entity_type, mode in non_overlapping:
-            if mode == "normalize":
-                replacement = self._normalize_alnum(entity_value)
-            else:
-                replacement = self._get_placeholder(entity_value, entity_type)
-            text = text[:start] + replacement + text[end:]
+    def protect_stream(self, chunks: Iterable[str], translate: bool = True, window_size: int = 100_000,
+                       overlap: int = 1_000, language: Optional[str] = None,
+                       entities: Optional[Iterable[str]] = None,
+                       exclude: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """
+        Protects a stream of text chunks (e.g. blocks read from a large file).
 
-        if translate and lang != "en":
-            text = self._translate_placeholders(text, lang)
+        Text is processed in windows of at most ``window_size`` characters. The
+        last ``overlap`` characters of a window (and any entity reaching into
+        them) are held back and scanned again with the next window, so entities
+        split across chunks are still found whole. Placeholders are shared
+        across the stream, as with repeated protect() calls.
 
-        return text
+        Args:
+            chunks: The input text, in pieces of any size
+            translate: Translate placeholders to the language detected in the first
+                window that has placeholders
+            window_size: Maximum number of characters scanned at once
+            overlap: Characters re-scanned with the next window; should exceed the
+                longest entity expected
+            language: Language of the text; skips detection when given
+            entities: Only detect these entity types (keys of ``rules``), e.g. {"email", "card"}
+            exclude: Entity types not to detect
+
+        Yields:
+            Protected text, in order; joined it equals protect() of the whole input
+            for entities shorter than ``overlap``. Detected text is never yielded
+            unmasked: an entity longer than the whole window is masked in pieces
+        """
+        if not 0 <= overlap < window_size:
+            raise ValueError("overlap must be smaller than window_size")
+
+        rules = self.select_rules(entities, exclude)
+        started, timings = time.perf_counter(), self._begin_call()
+        chars = 0
+        target_lang = None
+        lang_known = not translate
+        buffer = ''
+        pos = 0
+        pending, pending_size = [], 0
+        for chunk in itertools.chain(chunks, [None]):
+            final = chunk is None
+            if not final:
+                pending.append(chunk)
+                pending_size += len(chunk)
+                chars += len(chunk)
+                if len(buffer) - pos + pending_size < window_size:
+                    continue
+            buffer = buffer[pos:] + ''.join(pending)
+            pos = 0
+            pending, pending_size = [], 0
+
+            while len(buffer) - pos >= window_size or (final and pos < len(buffer)):
+                window = buffer[pos:pos + window_size]
+                doc = self._parse(window, timings, rules)
+                found = self._detect(window, doc, rules, timings)
+                start = time.perf_counter()
+                if final and pos + window_size >= len(buffer):
+                    cut = len(window)
+                else:
+                    cut = self._stream_cut(window, found, overlap)
+                found = [e for e in found if e[1] <= cut]
+                start = _lap(timings, 'rules', start)
+                if not lang_known and any(mode != 'normalize' for *_, mode in found):
+                    # Decided once, so the whole stream uses the same placeholders
+                    target_lang = self._target_lang(window, found, translate, language)
+                    lang_known = True
+                    start = _lap(timings, 'language', start)
+                start = self._translate_labels(found, target_lang, timings, start)
+                yield self._render(window[:cut], found, target_lang)[0]
+                _lap(timings, 'render', start)
+                pos += cut
+        self._end_call('protect_stream', started, chars)
+
+    def prefilter_stats(self) -> Dict[str, float]:
+        """
+        Reports how much the NER prefilter saved on this instance.
+
+        Returns:
+            Texts ``checked`` and ``skipped``, the ``hit_rate`` (share skipped),
+            ``prefilter_seconds`` spent checking, and ``estimated_seconds_saved``:
+            the skipped characters at the average spaCy cost per character of
+            the texts that were parsed
+        """
+        counts = self._prefilter_counts
+        per_char = counts['ner_seconds'] / counts['ner_chars'] if counts['ner_chars'] else 0.0
+        return {
+            'checked': counts['checked'],
+            'skipped': counts['skipped'],
+            'hit_rate': counts['skipped'] / counts['checked'] if counts['checked'] else 0.0,
+            'prefilter_seconds': counts['seconds'],
+            'estimated_seconds_saved': counts['skipped_chars'] * per_char,
+        }
 
     def get_mapping(self) -> Dict[str, str]:
         """
@@ -270,9 +1173,9 @@ class PromptShield:
         Returns:
             Text with the specified placeholder restored to its original value
         """
-        mapping = self.get_mapping()
-        if placeholder in mapping:
-            return text.replace(placeholder, mapping[placeholder])
+        original = self._lookup_placeholder(placeholder, self._get_restore_index())
+        if original is not None:
+            return text.replace(placeholder, original)
         return text
 
     def restore_all(self, text: str) -> str:
@@ -285,7 +1188,73 @@ class PromptShield:
         Returns:
             Text with all placeholders restored to their original values
         """
-        mapping = self.get_mapping()
-        for placeholder, original in mapping.items():
-            text = text.replace(placeholder, original)
-        return text
+        if '[' not in text:
+            return text
+        index = self._get_restore_index()
+        # One scan for placeholder-shaped tokens, each resolved with a dict
+        # lookup, so the cost doesn't grow with the number of placeholders
+        def replace(match):
+            original = self._lookup_placeholder(match.group(), index)
+            return match.group() if original is None else original
+
+        return self.PLACEHOLDER_TOKEN.sub(replace, text)
+
+    def stream_restorer(self) -> StreamRestorer:
+        """
+        Returns a StreamRestorer for restoring output that arrives in chunks.
+
+        Example:
+            restorer = shield.stream_restorer()
+            for delta in llm_stream:
+                print(restorer.feed(delta), end="")
+            print(restorer.flush())
+        """
+        return StreamRestorer(self)
+
+    def document(self, translate: bool = True, language: Optional[str] = None,
+                 entities: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None,
+                 margin: int = 200, document_id: Optional[Hashable] = None) -> ProtectedDocument:
+        """
+        Returns a ProtectedDocument, for protecting new versions of one text
+        by re-detecting only what changed.
+
+        Args:
+            translate, language, entities, exclude: As for protect()
+            margin: Characters around an edit that are detected again as well
+            document_id: Keep the document in this view's session under this ID:
+                later calls with the same ID return it (with the options it was
+                made with), its memory counts towards the session's and it is
+                dropped with the session
+
+        Raises:
+            ValueError: If ``document_id`` is given to an instance that isn't a session view
+
+        Example:
+            document = shield.document()
+            protected, spans = document.update(text)
+            protected, spans = document.update(edited_text)  # only the edit is re-detected
+        """
+        if document_id is None:
+            return ProtectedDocument(self, translate, language, entities, exclude, margin)
+        if self._session is None:
+            raise ValueError("document_id needs a session view, see for_session()")
+        document = self._session.documents.get(document_id)
+        if document is None:
+            document = ProtectedDocument(self, translate, language, entities, exclude, margin, self._session)
+            self._session.documents[document_id] = document
+        document.shield = self
+        return document
+
+    def restore_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Restores placeholders in a stream of chunks, yielding restored text as
+        soon as it's final. Placeholders split across chunks are restored whole.
+        """
+        restorer = self.stream_restorer()
+        for chunk in chunks:
+            restored = restorer.feed(chunk)
+            if restored:
+                yield restored
+        restored = restorer.flush()
+        if restored:
+            yield restored
@@ -0,0 +1,153 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+# Rough cost of one placeholder beyond its two strings: an entry in the
+# per-type placeholders dict and one in the restore index
+ENTRY_OVERHEAD = 2 * 48
+
+
+class Session:
+    """
+    The placeholders of one conversation: what PromptShield.placeholders_cache
+    and its restore index hold for a single instance.
+    """
+
+    def __init__(self, session_id: Optional[Hashable] = None, store: Optional['MappingStore'] = None):
+        self.session_id = session_id
+        self.placeholders_cache: Dict[str, Dict] = {}
+        # placeholder -> original, kept in step with placeholders_cache
+        self.restore_index: Dict[str, str] = {}
+        # ProtectedDocuments by ID, see PromptShield.document(); dropped with the session
+        self.documents: Dict[Hashable, object] = {}
+        # Approximate bytes held by the placeholders and documents above
+        self.nbytes = 0
+        self.last_used = 0.0
+        # Serialises calls on this session from several threads (placeholder numbering isn't atomic)
+        self.lock = threading.Lock()
+        self._store = store
+
+    def account(self, original: str, placeholder: str):
+        """Counts a new placeholder towards this session's (and its store's) memory"""
+        self.resize(sys.getsizeof(original) + sys.getsizeof(placeholder) + ENTRY_OVERHEAD)
+
+    def resize(self, nbytes: int):
+        """Counts ``nbytes`` more (or, if negative, fewer) towards this session's (and its store's) memory"""
+        self.nbytes += nbytes
+        if self._store is not None:
+            self._store._grew(nbytes)
+
+
+class MappingStore:
+    """
+    Keeps placeholder mappings per session ID, see PromptShield.for_session().
+    Subclass and override get() and drop() to keep them elsewhere.
+    """
+
+    def get(self, session_id: Hashable) -> Session:
+        """Returns the session's placeholders, creating them on first use"""
+        raise NotImplementedError
+
+    def drop(self, session_id: Hashable) -> bool:
+        """Forgets a session; returns whether it existed"""
+        raise NotImplementedError
+
+    def _grew(self, nbytes: int):
+        """Called when a session of this store grows (or shrinks, if ``nbytes`` is negative)"""
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class MemoryMappingStore(MappingStore):
+    """
+    In-process sessions with least-recently-used and idle-time eviction.
+
+    Limits are enforced whenever a session is fetched, so a session that grows
+    during a call may push the store over ``max_bytes`` until the next fetch.
+    The session being fetched is never evicted.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = 10_000, ttl: Optional[float] = 3600.0,
+                 max_bytes: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_sessions: Sessions kept before the least recently used is dropped (None = no limit)
+            ttl: Seconds a session may stay unused before it's dropped (None = forever)
+            max_bytes: Approximate memory all sessions may use together (None = no limit)
+            clock: Time source, in seconds
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._sessions: 'OrderedDict[Hashable, Session]' = OrderedDict()
+        self._bytes = 0
+        self._evicted = {'lru': 0, 'ttl': 0, 'memory': 0}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: Hashable) -> bool:
+        return session_id in self._sessions
+
+    def _evict(self, reason: str):
+        _, session = self._sessions.popitem(last=False)
+        session._store = None
+        self._bytes -= session.nbytes
+        self._evicted[reason] += 1
+
+    def get(self, session_id: Hashable) -> Session:
+        now = self.clock()
+        with self._lock:
+            # Least recently used first, so expired sessions are all at the front
+            if self.ttl is not None:
+                while self._sessions and next(iter(self._sessions.values())).last_used + self.ttl < now:
+                    self._evict('ttl')
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, self)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+
+            if self.max_sessions is not None:
+                while len(self._sessions) > self.max_sessions:
+                    self._evict('lru')
+            if self.max_bytes is not None:
+                while self._bytes > self.max_bytes and len(self._sessions) > 1:
+                    self._evict('memory')
+            return session
+
+    def drop(self, session_id: Hashable) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            session._store = None
+            self._bytes -= session.nbytes
+            return True
+
+    def _grew(self, nbytes: int):
+        with self._lock:
+            self._bytes += nbytes
+
+    def usage(self) -> Dict[Hashable, int]:
+        """Approximate bytes per session, least recently used first"""
+        with self._lock:
+            return {session_id: session.nbytes for session_id, session in self._sessions.items()}
+
+    def stats(self) -> Dict[str, int]:
+        """Sessions held, their approximate bytes and evictions so far by reason"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'bytes': self._bytes,
+                'evicted_lru': self._evicted['lru'],
+                'evicted_ttl': self._evicted['ttl'],
+                'evicted_memory': self._evicted['memory'],
+            }
@@ -1,5 +1,6 @@
 import pytest
-from pshield import PromptShield
+from pshield import MemoryMappingStore, PromptShield, PromptShieldPool, Translator, load_pipeline
+from pshield.translation import LABELS
 
 @pytest.fixture
 def shield():
@@ -132,6 +133,80 @@ def test_translation_with_multiple_languages(shield):
     assert "100 USD" not in protected
     assert "maria@example.com" not in protected
 
+def test_restore_translated_placeholders(shield):
+    text = "Bob a envoyé 50 USD à bob@example.com."
+    protected = shield.protect(text, translate=True)
+    assert shield.restore_all(protected) == text
+    assert shield.restore("Écrire à [E-MAIL_1]", "[E-MAIL_1]") == "Écrire à bob@example.com"
+    assert "".join(shield.restore_stream(["[CORREO ELEC", "TRÓNICO_1]"])) == "bob@example.com"
+
+
+def test_custom_translator_is_cached(shield):
+    class Upper(Translator):
+        calls = 0
+
+        def translate(self, label, lang):
+            Upper.calls += 1
+            return "X" + label
+
+    custom = PromptShield(nlp=shield.ner, translator=Upper())
+    assert custom._translate_placeholder("[EMAIL_1]", "fr") == "[XEMAIL_1]"
+    assert custom._translate_placeholder("[EMAIL_2]", "fr") == "[XEMAIL_2]"
+    assert Upper.calls == 1
+
+
+def test_default_translator_stays_offline(shield):
+    assert shield.protect("Mail bob@example.com", language="ja") == "Mail [EMAIL_1]"
+
+
+def test_google_translator_gives_up_after_timeout(monkeypatch):
+    import threading
+    import time
+    from pshield import GoogleLabelTranslator
+    release = threading.Event()
+    translator = GoogleLabelTranslator(timeout=0.05)
+    monkeypatch.setattr(translator, "_translate", lambda label, lang: release.wait() and "X")
+    started = time.perf_counter()
+    assert translator.translate("EMAIL", "ja") is None
+    assert time.perf_counter() - started < 1
+    release.set()
+
+
+def test_offline_translator_covers_builtin_labels(shield):
+    labels = {entity_type.upper() for entity_type, rule in shield.rules.items() if rule.get('mode') != 'normalize'}
+    for lang in ("fr", "es", "de", "it", "pt", "pl", "nl"):
+        assert labels <= set(LABELS[lang])
+
+
+def test_language_detected_only_when_needed(shield, monkeypatch):
+    import pshield.pshield as module
+    calls = []
+    monkeypatch.setattr(module, "detect_language", lambda text: calls.append(text) or "fr")
+    shield.protect("Nothing sensitive here.")
+    shield.protect("Mail bob@example.com", translate=False)
+    assert calls == []
+    assert shield.protect("Mail bob@example.com", language="es") == "Mail [CORREO ELECTRÓNICO_1]"
+    assert calls == []
+    assert shield.protect("Mail bob@example.com") == "Mail [E-MAIL_1]"
+    assert len(calls) == 1
+    assert set(shield.timings) == {"prefilter", "ner", "rules", "resolve", "language", "translate", "render"}
+
+
+def test_detect_language_is_cached(monkeypatch):
+    from pshield import translation
+    text = "Bob a envoyé 50 USD à son ami hier soir."
+    assert translation.detect_language(text) == "fr"
+
+    class Broken:
+        def create(self):
+            raise RuntimeError
+
+    monkeypatch.setattr(translation, "_language_detector_factory", Broken())
+    # Served from the cache; anything new can't be detected any more
+    assert translation.detect_language(text) == "fr"
+    assert translation.detect_language("Another text entirely") == "en"
+
+
 def test_no_translation_for_english(shield):
     text = "Bob sent $50 to bob@example.com."
     protected = shield.protect(text, translate=False)
@@ -308,6 +383,21 @@ def test_place_country(shield):
     assert "[PLACE_" in protected
 
 
+def test_ner_runs_once_per_protect(shield):
+    calls = []
+    nlp = shield.ner
+
+    def counting_nlp(text):
+        calls.append(text)
+        return nlp(text)
+
+    shield.ner = counting_nlp
+    protected = shield.protect("Bob flew from Paris to London.", translate=False)
+    assert len(calls) == 1
+    assert "[NAME_" in protected
+    assert "[PLACE_" in protected
+
+
 # =========================
 # Bitcoin Address Tests
 # =========================
@@ -425,6 +515,19 @@ def test_overlapping_entities(shield):
     assert "[PHONE_" in protected
 
 
+def test_rules_compiled_once_per_rule_set(shield):
+    from pshield.matcher import compile_rules
+    other = PromptShield(nlp=shield.ner)
+    assert compile_rules(shield.rules) is compile_rules(other.rules)
+
+
+def test_rule_added_after_init_is_applied(shield):
+    shield.rules['ticket'] = {'patterns': [r'ticket #\d+']}
+    protected = shield.protect("See ticket #4821 for details.", translate=False)
+    assert "#4821" not in protected
+    assert "[TICKET_1]" in protected
+
+
 def test_repeated_entity_same_placeholder(shield):
     # Same entity value should get the same placeholder
     text = "Email alice@test.com then email alice@test.com again."
@@ -433,6 +536,391 @@ def test_repeated_entity_same_placeholder(shield):
     assert protected.count("[EMAIL_1]") == 2
 
 
+def test_protect_spans_offsets(shield):
+    text = "Mail bob@example.com or call +1 415 555 2671."
+    protected, spans = shield.protect_spans(text, translate=False)
+    assert protected == shield.protect(text, translate=False)
+    assert [span.entity_type for span in spans] == ["email", "phone"]
+    for span in spans:
+        assert text[span.start:span.end] == span.original
+        assert protected[span.output_start:span.output_end] == span.placeholder
+        assert shield.get_mapping()[span.placeholder] == span.original
+
+
+def test_protect_batch_matches_protect(shield):
+    texts = ["Mail bob@example.com today.", "Call +1 415 555 2671 or bob@example.com."]
+    expected = PromptShield(nlp=shield.ner)
+    results = shield.protect_batch(texts, translate=False, batch_size=1)
+    assert [protected for protected, _ in results] == [expected.protect(text, translate=False) for text in texts]
+    assert results[1][1] == {"[PHONE_1]": "+1 415 555 2671", "[EMAIL_1]": "bob@example.com"}
+    assert shield.get_mapping() == expected.get_mapping()
+
+
+def test_protect_batch_placeholders_per_text(shield):
+    texts = ["Mail bob@example.com.", "Mail alice@example.com."]
+    results = shield.protect_batch(texts, translate=False, shared_placeholders=False)
+    assert results == [
+        ("Mail [EMAIL_1].", {"[EMAIL_1]": "bob@example.com"}),
+        ("Mail [EMAIL_1].", {"[EMAIL_1]": "alice@example.com"}),
+    ]
+    assert shield.get_mapping() == {}
+
+
+def test_protect_batch_mapping_uses_translated_placeholders(shield):
+    (protected, mapping), = shield.protect_batch(["Envoyez à bob@example.com."], language="fr",
+                                                 shared_placeholders=False)
+    assert protected == "Envoyez à [E-MAIL_1]."
+    assert mapping == {"[E-MAIL_1]": "bob@example.com"}
+
+
+def test_protect_stream_matches_protect(shield):
+    text = "Mail bob@example.com or alice@example.com, card 4111 1111 1111 1111.\n" * 20
+    expected = PromptShield(nlp=shield.ner)
+    chunks = (text[i:i + 7] for i in range(0, len(text), 7))
+    protected = "".join(shield.protect_stream(chunks, translate=False, window_size=120, overlap=40))
+    assert protected == expected.protect(text, translate=False)
+    assert shield.get_mapping() == expected.get_mapping()
+
+
+
+def test_protect_stream_masks_entities_longer_than_the_held_back_tail(shield):
+    url = "https://example.com/" + "a" * 80
+    text = f"{url} then more words follow here and there {url[:-10]} and the end"
+    expected = PromptShield(nlp=shield.ner)
+    protected = "".join(shield.protect_stream([text], translate=False, window_size=100, overlap=30))
+    assert protected == expected.protect(text, translate=False)
+    assert "aaaa" not in protected
+
+def test_protect_stream_rejects_overlap_larger_than_window(shield):
+    with pytest.raises(ValueError):
+        list(shield.protect_stream(["text"], window_size=10, overlap=10))
+
+
+def test_restore_all_does_not_rebuild_mapping(shield, monkeypatch):
+    text = " ".join(f"user{i}@example.com" for i in range(50))
+    protected = shield.protect(text, translate=False)
+    monkeypatch.setattr(shield, "get_mapping", lambda: pytest.fail("mapping rebuilt"))
+    assert shield.restore_all(protected + " [EMAIL_999] [note]") == text + " [EMAIL_999] [note]"
+    assert shield.restore(protected, "[EMAIL_2]").split()[1] == "user1@example.com"
+
+
+def test_restore_after_placeholders_cache_replaced(shield):
+    shield.protect("Mail bob@example.com", translate=False)
+    shield.placeholders_cache = {}
+    assert shield.restore_all("[EMAIL_1]") == "[EMAIL_1]"
+    shield.protect("Mail alice@example.com", translate=False)
+    assert shield.restore_all("[EMAIL_1]") == "alice@example.com"
+
+
+def test_stream_restorer_holds_back_partial_placeholder(shield):
+    shield.protect("Mail bob@example.com or alice@example.com", translate=False)
+    restorer = shield.stream_restorer()
+    assert restorer.feed("Write to [EM") == "Write to "
+    assert restorer.feed("AIL_2") == ""
+    assert restorer.feed("] and [x] [") == "alice@example.com and [x] "
+    assert restorer.feed("EMAIL_1].") == "bob@example.com."
+    assert restorer.feed(" [EMAIL_") == " "
+    assert restorer.flush() == "[EMAIL_"
+
+
+def test_restore_stream_matches_restore_all(shield):
+    protected = shield.protect(SAMPLE_INPUT, translate=False)
+    chunks = [protected[i:i + 3] for i in range(0, len(protected), 3)]
+    assert "".join(shield.restore_stream(chunks)) == shield.restore_all(protected)
+
+
+def test_regex_engine_skips_spacy():
+    shield = PromptShield(engine="regex")
+    assert shield.ner is None
+    assert shield.protect("mail Marcus Hill at bob@example.com", translate=False) == "mail [NAME_1] at [EMAIL_1]"
+    with pytest.raises(ValueError):
+        PromptShield(engine="bert")
+
+
+def test_ner_prefilter_skips_lowercase_text(shield):
+    calls = []
+    ner = shield.ner
+    shield.ner = lambda text: calls.append(text) or ner(text)
+    log = 'user_id=42 email=bob@example.com status="sent to paris"'
+    assert shield.protect(log, translate=False) == 'user_id=42 email=[EMAIL_1] status="sent to paris"'
+    assert shield.protect("Bob flew to Paris", translate=False) == "[NAME_1] flew to [PLACE_1]"
+    assert shield.protect("Ärger in Paris", translate=False).endswith("[PLACE_1]")
+    assert len(calls) == 2
+    stats = shield.prefilter_stats()
+    assert (stats["checked"], stats["skipped"], stats["hit_rate"]) == (3, 1, 1 / 3)
+
+    shield.ner_prefilter = None
+    shield.protect(log, translate=False)
+    assert len(calls) == 3
+
+
+def test_entity_selection(shield):
+    text = "Bob paid $50 with card 4111 1111 1111 1111, mail bob@example.com"
+    calls = []
+    ner = shield.ner
+    shield.ner = lambda text: calls.append(text) or ner(text)
+    assert shield.protect(text, translate=False, entities={"email", "card"}) == \
+        "Bob paid $50 with card [CARD_1], mail [EMAIL_1]"
+    assert calls == []
+    assert "[AMOUNT_1]" not in shield.protect(text, translate=False, exclude=["amount"])
+    assert list(shield.select_rules(exclude={"name"})) == [t for t in shield.rules if t != "name"]
+    with pytest.raises(ValueError):
+        shield.protect(text, entities={"emails"})
+
+
+def test_ner_only_profile():
+    nlp = load_pipeline()
+    assert nlp.pipe_names == ["ner"]
+    assert set(load_pipeline(profile="full").pipe_names) > {"ner", "parser"}
+    with pytest.raises(ValueError):
+        load_pipeline(profile="tiny")
+
+
+def test_ner_only_opt_in_for_own_nlp():
+    nlp = load_pipeline(profile="full")
+    try:
+        assert PromptShield(nlp=nlp).ner.pipe_names == nlp.pipe_names
+        shield = PromptShield(nlp=nlp, profile="ner-only")
+        assert shield.ner.pipe_names == ["ner"]
+        assert shield.protect("Marcus Hill flew to Paris", translate=False) == "[NAME_1] flew to [PLACE_1]"
+    finally:
+        for name in nlp.disabled:
+            nlp.enable_pipe(name)
+
+
+
+def test_sentence_chunks_give_the_same_entities(shield):
+    from pshield.pipeline import sentence_chunks
+    text = "Marcus Hill flew to Paris. status=ok code=7 retry=no\nLina Petrova mailed x@example.com from Warsaw! " * 5
+    chunks = list(sentence_chunks(text, 30))
+    assert "".join(text[start:end] for start, end in chunks) == text and len(chunks) > 5
+
+    expected = PromptShield(nlp=shield.ner).protect_spans(text, translate=False)
+    shield.sentence_chunk_size = 30
+    assert shield.protect_spans(text, translate=False) == expected
+    # The lower-case sentences were only tokenized
+    assert shield.prefilter_stats()["estimated_seconds_saved"] > 0
+    assert shield.protect_batch([text, "Bob"], translate=False, shared_placeholders=False)[0][0] == expected[0]
+
+def test_pool_results_restore_in_parent(shield):
+    texts = [f"Marcus Hill paid ${n}.00 to jane{n}@example.com" for n in range(20)]
+    with PromptShieldPool(2, nlp=shield.ner) as pool:
+        results = pool.map(texts, chunksize=3, translate=False)
+        unordered = sorted(pool.imap_unordered(texts, translate=False), key=lambda result: result.index)
+        single = pool.submit(texts[5], translate=False).result()
+
+    assert [result.index for result in results] == list(range(20))
+    assert results == unordered
+    for text, result in zip(texts, results):
+        fresh = PromptShield(nlp=shield.ner)
+        assert result.text == fresh.protect(text, translate=False)
+        assert result.restore(result.text) == text
+    assert single.text == results[5].text and single.mapping == results[5].mapping
+
+
+def test_sessions_keep_separate_placeholders(shield):
+    alice = shield.for_session("alice")
+    assert alice.protect("mail a@example.com", translate=False) == "mail [EMAIL_1]"
+    assert shield.for_session("bob").protect("mail b@example.com", translate=False) == "mail [EMAIL_1]"
+    alice = shield.for_session("alice")
+    assert alice.protect("mail c@example.com", translate=False) == "mail [EMAIL_2]"
+    assert alice.restore_all("[EMAIL_1] [EMAIL_2]") == "a@example.com c@example.com"
+    assert shield.get_mapping() == {}
+    assert shield.end_session("alice") and "alice" not in shield.store
+
+
+
+def test_session_view_batch_without_shared_placeholders_keeps_the_session(shield):
+    view = shield.for_session("alice")
+    view.protect_batch(["mail b@example.com"], translate=False, shared_placeholders=False)
+    assert view.protect("mail x@example.com", translate=False) == "mail [EMAIL_1]"
+    assert shield.for_session("alice").restore_all("[EMAIL_1]") == "x@example.com"
+
+def test_session_views_share_a_lock(shield):
+    assert shield.for_session("alice").lock is shield.for_session("alice").lock
+    assert shield.for_session("alice").lock is not shield.for_session("bob").lock
+
+
+def test_memory_store_eviction():
+    now = [0.0]
+    store = MemoryMappingStore(max_sessions=2, ttl=10, clock=lambda: now[0])
+    shield = PromptShield(engine="regex", store=store)
+    for session_id in ("a", "b", "c"):
+        shield.for_session(session_id).protect("mail x@example.com", translate=False)
+    assert list(store.usage()) == ["b", "c"] and store.stats()["evicted_lru"] == 1
+
+    now[0] = 20.0
+    shield.for_session("d")
+    assert list(store.usage()) == ["d"] and store.stats()["evicted_ttl"] == 2
+
+    store.max_bytes = store.stats()["bytes"] + 1
+    shield.for_session("d").protect("mail y@example.com", translate=False)
+    shield.for_session("e")
+    assert list(store.usage()) == ["e"] and store.stats() == {
+        'sessions': 1, 'bytes': 0, 'evicted_lru': 1, 'evicted_ttl': 2, 'evicted_memory': 1,
+    }
+
+
+def test_instrumentation_records_stages_and_rules(shield):
+    text = "Marcus Hill paid $50 to jane@example.com"
+    events = []
+    instrumentation = shield.instrument()
+    instrumentation.add_callback(events.append)
+    view = shield.for_session("s")
+    assert view.protect(text, translate=False) == PromptShield(nlp=shield.ner).protect(text, translate=False)
+    list(shield.protect_stream([text], translate=False))
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["calls"]["protect"] == {"count": 1, "seconds": events[0]["seconds"], "chars": len(text)}
+    assert snapshot["calls"]["protect_stream"]["count"] == 1
+    assert set(events[0]["stages"]) == {"prefilter", "ner", "rules", "resolve", "language", "render"}
+    assert events[0]["rules"]["email"]["entities"] == 1
+    assert snapshot["rules"]["name"]["entities"] == 2
+    metrics = instrumentation.prometheus()
+    assert 'pshield_call_seconds_count{call="protect"} 1' in metrics
+    assert 'pshield_rule_entities_total{rule="amount"} 2' in metrics
+
+
+# Rules before they were rewritten to run in linear time
+QUADRATIC_PATTERNS = {
+    ('email', 0): r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    ('amount', 1): r'\d+(?:,\d{3})*(?:\.\d{1,2})?\s*(?:USD|EUR|GBP|JPY|AUD|CAD|RUB|CNY|dollars?)',
+    ('jwt', 0): r'eyJ[A-Za-z0-9_-]*\.eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+',
+    ('jwt', 1): r'eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+',
+    ('alnum_code', 0): r'\b(?=[A-Za-z0-9\-]*[A-Za-z])(?=[A-Za-z0-9\-]*\d)[A-Za-z0-9\-]+\b',
+}
+
+
+@pytest.mark.parametrize("rule", QUADRATIC_PATTERNS)
+def test_linear_patterns_match_like_originals(rule):
+    import random
+    import re
+    import time
+    entity_type, index = rule
+    old = re.compile(QUADRATIC_PATTERNS[rule])
+    new = re.compile(PromptShield(engine="regex").rules[entity_type]['patterns'][index])
+    group = 'entity' if 'entity' in new.groupindex else 0
+    pieces = ['a', 'Z', '1', '9', '-', '.', '_', '@', '%', '+', '|', ' ', ',', 'é', 'eyJ', 'USD', 'x@y.co']
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+        assert [m.span() for m in old.finditer(text)] == [m.span(group) for m in new.finditer(text)], text
+
+    for text in ('1' * 50_000, '1-' * 25_000, 'a.' * 25_000, 'eyJ' * 20_000):
+        start = time.perf_counter()
+        list(new.finditer(text))
+        assert time.perf_counter() - start < 1.0
+
+
+def test_triggers_skip_rules_without_changing_results():
+    from pshield.matcher import compile_rules
+    rules = PromptShield(engine="regex").rules
+    untriggered = {
+        entity_type: {key: value for key, value in rule.items() if key not in ("triggers", "trigger_class")}
+        for entity_type, rule in rules.items()
+    }
+    matcher = compile_rules(rules)
+    texts = [SAMPLE_INPUT, "please review the notes before the meeting", "Ask Marcus Hill"] + VALID_EMAILS
+    for text in texts:
+        assert matcher.resolve(text) == compile_rules(untriggered).resolve(text)
+
+    names = list(rules).index("name")
+    assert matcher.ruled_out("Ask Marcus Hill") == {i for i in matcher.triggers if i != names}
+    assert matcher.ruled_out("please review the notes") == set(matcher.triggers)
+
+
+def test_dictionary_rule(tmp_path):
+    from pshield import Dictionary
+    terms = ["Blue Falcon", "Falcon", "ACC-0042", "he"]
+    dictionary = Dictionary(terms, case_sensitive=False)
+    text = "blue falcon and the ACC-0042 ledger (acc-00421 is not one)"
+    assert dictionary.find(text) == [("blue falcon", 0, 11), ("falcon", 5, 11), ("ACC-0042", 20, 28)]
+    assert Dictionary(terms).find(text) == [("ACC-0042", 20, 28)]
+    assert ("he", 17, 19) in Dictionary(terms, word_boundary=False).find(text)
+
+    path = str(tmp_path / "terms.ac")
+    dictionary.save(path)
+    loaded = Dictionary.load(path)
+    assert len(loaded) == 4 and loaded.find(text) == dictionary.find(text)
+
+    shield = PromptShield(engine="regex")
+    shield.rules = {"project": {"dictionary": loaded}, **shield.rules}
+    assert shield.protect("ask Blue Falcon at x@example.com", translate=False) == \
+        "ask [PROJECT_1] at [EMAIL_1]"
+
+
+def test_document_update_redetects_only_the_edit(shield):
+    lines = [f"Line {i}: mail user{i}@example.com or call +1 415 555 {1000 + i}" for i in range(200)]
+    text = "\n".join(lines)
+    document = shield.document(translate=False)
+    protected, spans = document.update(text)
+    spans = list(spans)
+    assert document.window == (0, len(text))
+
+    edited = text.replace("user100@example.com", "Marcus Hill at jane@example.com")
+    full = PromptShield(nlp=shield.ner)
+    full.protect(text, translate=False)
+    assert document.update(edited) == full.protect_spans(edited, translate=False)
+    start, end = document.window
+    assert end - start < 1000
+    # Spans outside the window are reused, not detected again; the ones after it only move
+    assert document.spans[0] is spans[0]
+    delta = len(edited) - len(text)
+    assert document.spans[-1][:5] == (spans[-1].start + delta, spans[-1].end + delta) + spans[-1][2:5]
+    assert shield.restore_all(document.protected) == edited
+
+    shortened = edited[:edited.index("Line 150")]
+    assert document.update(shortened) == full.protect_spans(shortened, translate=False)
+    assert document.update(shortened)[0] == document.protected and document.window == (0, 0)
+
+
+
+def test_document_follows_an_entity_past_the_margin(shield):
+    text = "\n".join(f"Line {i}: note {i}" for i in range(50)) + "\nTeam +43 030 017 125 "
+    document = shield.document(translate=False, margin=0)
+    document.update(text)
+    edited = text + "6 left"
+    full = PromptShield(nlp=shield.ner)
+    full.protect(text, translate=False)
+    assert document.update(edited) == full.protect_spans(edited, translate=False)
+    assert document.spans[-1].original == "+43 030 017 125 6"
+
+
+def test_session_keeps_documents_by_id(shield):
+    store = MemoryMappingStore()
+    shield = PromptShield(nlp=shield.ner, store=store)
+    alice = shield.for_session("alice")
+    document = alice.document(translate=False, document_id="notes")
+    document.update("mail a@example.com\n" * 100)
+    assert shield.for_session("alice").document(document_id="notes") is document
+    assert store.usage()["alice"] >= document.nbytes > 0
+
+    with pytest.raises(ValueError):
+        shield.document(document_id="notes")
+    store.drop("alice")
+    assert shield.for_session("alice").document(document_id="notes") is not document
+
+def test_time_budget_actions():
+    from pshield import DetectionTimeout
+    shield = PromptShield(engine="regex")
+    text = "mail x@example.com"
+    shield.time_budget = 0.0
+    assert shield.protect(text, translate=False) == "mail [EMAIL_1]"
+    assert shield.over_budget and shield.skipped_rules == []
+
+    shield.budget_action = "skip"
+    assert shield.protect(text, translate=False) == text
+    assert shield.over_budget and shield.skipped_rules == list(shield.rules)
+
+    shield.budget_action = "raise"
+    with pytest.raises(DetectionTimeout):
+        shield.protect(text, translate=False)
+
+    shield.time_budget = 10.0
+    assert shield.protect(text, translate=False) == "mail [EMAIL_1]"
+    assert not shield.over_budget
+
+
 # =========================
 # Full Sample Input Test
 # =========================
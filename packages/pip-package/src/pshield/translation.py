@@ -0,0 +1,223 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+# Placeholder labels translated per language (langdetect codes). Multi-word
+# labels are spaced the way the online translator used to return them.
+LABELS: Dict[str, Dict[str, str]] = {
+    'fr': {
+        'MEM': 'MÉMOIRE', 'CVV': 'CVV', 'EXP': 'EXPIRATION', 'CARD': 'CARTE', 'DATE': 'DATE',
+        'EMAIL': 'E-MAIL', 'URL': 'URL', 'IP': 'IP', 'PHONE': 'TÉLÉPHONE', 'AMOUNT': 'MONTANT',
+        'NAME': 'NOM', 'PLACE': 'LIEU', 'JWT': 'JWT', 'BTC_ADDRESS': 'ADRESSE BTC',
+        'ETH_ADDRESS': 'ADRESSE ETH', 'USERNAME': "NOM D'UTILISATEUR", 'COORD': 'COORDONNÉES',
+        'ALNUM_CODE': 'CODE ALPHANUMÉRIQUE',
+    },
+    'es': {
+        'MEM': 'MEMORIA', 'CVV': 'CVV', 'EXP': 'VENCIMIENTO', 'CARD': 'TARJETA', 'DATE': 'FECHA',
+        'EMAIL': 'CORREO ELECTRÓNICO', 'URL': 'URL', 'IP': 'IP', 'PHONE': 'TELÉFONO', 'AMOUNT': 'CANTIDAD',
+        'NAME': 'NOMBRE', 'PLACE': 'LUGAR', 'JWT': 'JWT', 'BTC_ADDRESS': 'DIRECCIÓN BTC',
+        'ETH_ADDRESS': 'DIRECCIÓN ETH', 'USERNAME': 'NOMBRE DE USUARIO', 'COORD': 'COORDENADAS',
+        'ALNUM_CODE': 'CÓDIGO ALFANUMÉRICO',
+    },
+    'de': {
+        'MEM': 'SPEICHER', 'CVV': 'CVV', 'EXP': 'ABLAUF', 'CARD': 'KARTE', 'DATE': 'DATUM',
+        'EMAIL': 'E-MAIL', 'URL': 'URL', 'IP': 'IP', 'PHONE': 'TELEFON', 'AMOUNT': 'BETRAG',
+        'NAME': 'NAME', 'PLACE': 'ORT', 'JWT': 'JWT', 'BTC_ADDRESS': 'BTC-ADRESSE',
+        'ETH_ADDRESS': 'ETH-ADRESSE', 'USERNAME': 'BENUTZERNAME', 'COORD': 'KOORDINATEN',
+        'ALNUM_CODE': 'ALPHANUMERISCHER CODE',
+    },
+    'it': {
+        'MEM': 'MEMORIA', 'CVV': 'CVV', 'EXP': 'SCADENZA', 'CARD': 'CARTA', 'DATE': 'DATA',
+        'EMAIL': 'EMAIL', 'URL': 'URL', 'IP': 'IP', 'PHONE': 'TELEFONO', 'AMOUNT': 'IMPORTO',
+        'NAME': 'NOME', 'PLACE': 'LUOGO', 'JWT': 'JWT', 'BTC_ADDRESS': 'INDIRIZZO BTC',
+        'ETH_ADDRESS': 'INDIRIZZO ETH', 'USERNAME': 'NOME UTENTE', 'COORD': 'COORDINATE',
+        'ALNUM_CODE': 'CODICE ALFANUMERICO',
+    },
+    'pt': {
+        'MEM': 'MEMÓRIA', 'CVV': 'CVV', 'EXP': 'VALIDADE', 'CARD': 'CARTÃO', 'DATE': 'DATA',
+        'EMAIL': 'E-MAIL', 'URL': 'URL', 'IP': 'IP', 'PHONE': 'TELEFONE', 'AMOUNT': 'VALOR',
+        'NAME': 'NOME', 'PLACE': 'LOCAL', 'JWT': 'JWT', 'BTC_ADDRESS': 'ENDEREÇO BTC',
+        'ETH_ADDRESS': 'ENDEREÇO ETH', 'USERNAME': 'NOME DE USUÁRIO', 'COORD': 'COORDENADAS',
+        'ALNUM_CODE': 'CÓDIGO ALFANUMÉRICO',
+    },
+    'pl': {
+        'MEM': 'PAMIĘĆ', 'CVV': 'CVV', 'EXP': 'WAŻNOŚĆ', 'CARD': 'KARTA', 'DATE': 'DATA',
+        'EMAIL': 'E-MAIL', 'URL': 'URL', 'IP': 'IP', 'PHONE': 'TELEFON', 'AMOUNT': 'KWOTA',
+        'NAME': 'IMIĘ', 'PLACE': 'MIEJSCE', 'JWT': 'JWT', 'BTC_ADDRESS': 'ADRES BTC',
+        'ETH_ADDRESS': 'ADRES ETH', 'USERNAME': 'NAZWA UŻYTKOWNIKA', 'COORD': 'WSPÓŁRZĘDNE',
+        'ALNUM_CODE': 'KOD ALFANUMERYCZNY',
+    },
+    'nl': {
+        'MEM': 'GEHEUGEN', 'CVV': 'CVV', 'EXP': 'VERVALDATUM', 'CARD': 'KAART', 'DATE': 'DATUM',
+        'EMAIL': 'E-MAIL', 'URL': 'URL', 'IP': 'IP', 'PHONE': 'TELEFOON', 'AMOUNT': 'BEDRAG',
+        'NAME': 'NAAM', 'PLACE': 'PLAATS', 'JWT': 'JWT', 'BTC_ADDRESS': 'BTC-ADRES',
+        'ETH_ADDRESS': 'ETH-ADRES', 'USERNAME': 'GEBRUIKERSNAAM', 'COORD': 'COÖRDINATEN',
+        'ALNUM_CODE': 'ALFANUMERIEKE CODE',
+    },
+}
+
+
+class Translator:
+    """
+    Translates placeholder labels ("EMAIL" -> "E-MAIL"). Subclass and
+    override translate() to plug in another backend.
+    """
+
+    def translate(self, label: str, lang: str) -> Optional[str]:
+        """
+        Args:
+            label: Upper-case English label, e.g. "EMAIL"
+            lang: Target language code, e.g. "fr"
+
+        Returns:
+            The upper-case translated label, None if this translator doesn't know it
+        """
+        raise NotImplementedError
+
+    def known(self) -> Iterable[Tuple[str, str, str]]:
+        """(label, lang, translated) triples known up front, used for restoring"""
+        return ()
+
+
+class OfflineTranslator(Translator):
+    """Looks labels up in a static table (the built-in ``LABELS`` by default)"""
+
+    def __init__(self, table: Optional[Dict[str, Dict[str, str]]] = None):
+        self.table = LABELS if table is None else table
+
+    def translate(self, label: str, lang: str) -> Optional[str]:
+        return self.table.get(lang, {}).get(label)
+
+    def known(self) -> Iterable[Tuple[str, str, str]]:
+        for lang, labels in self.table.items():
+            for label, translated in labels.items():
+                yield label, lang, translated
+
+
+class GoogleLabelTranslator(Translator):
+    """
+    Translates labels with deep-translator's GoogleTranslator (needs network access).
+
+    Not used unless asked for, e.g. after the offline table:
+
+        PromptShield(translator=CachedTranslator(OfflineTranslator(), GoogleLabelTranslator()))
+
+    Args:
+        timeout: Seconds to wait for an answer before giving up on the label
+            (deep-translator sets no timeout of its own)
+    """
+
+    def __init__(self, timeout: float = 2.0):
+        self.timeout = timeout
+
+    def translate(self, label: str, lang: str) -> Optional[str]:
+        result = []
+        # A daemon thread, so a request that never returns doesn't hold up protect() or exit
+        worker = threading.Thread(target=lambda: result.append(self._translate(label, lang)), daemon=True)
+        worker.start()
+        worker.join(self.timeout)
+        return result[0] if result else None
+
+    def _translate(self, label: str, lang: str) -> Optional[str]:
+        from deep_translator import GoogleTranslator
+
+        try:
+            return GoogleTranslator(source='en', target=lang).translate(label.lower()).upper()
+        except:
+            return None
+
+
+class CachedTranslator(Translator):
+    """
+    Tries ``translators`` in order and memoizes the result per (label, lang),
+    misses included, so each label costs at most one lookup per language.
+
+    Also keeps the reverse table (translated label -> English label) that
+    PromptShield uses to restore translated placeholders.
+    """
+
+    def __init__(self, *translators: Translator):
+        self.translators = translators
+        self.cache: Dict[Tuple[str, str], str] = {}
+        self.reverse: Dict[str, str] = {}
+        self.longest_label = 0
+        for translator in translators:
+            for label, _, translated in translator.known():
+                self._remember(label, translated)
+
+    def _remember(self, label: str, translated: str):
+        self.reverse.setdefault(translated, label)
+        self.longest_label = max(self.longest_label, len(translated))
+
+    def translate(self, label: str, lang: str) -> str:
+        """Returns the translated label, or ``label`` itself if no translator knows it"""
+        key = (label, lang)
+        if key not in self.cache:
+            translated = None
+            for translator in self.translators:
+                translated = translator.translate(label, lang)
+                if translated:
+                    break
+            self.cache[key] = translated or label
+            self._remember(label, self.cache[key])
+        return self.cache[key]
+
+    def untranslate(self, translated: str) -> Optional[str]:
+        """Returns the English label for a translated one, None if it's unknown"""
+        return self.reverse.get(translated)
+
+    def known(self) -> Iterable[Tuple[str, str, str]]:
+        for (label, lang), translated in self.cache.items():
+            yield label, lang, translated
+
+
+# Shared by every PromptShield that isn't given its own translator, so the
+# cache outlives the short-lived instances the servers create per request.
+# Offline only: protect() never waits on the network unless asked to.
+default_translator = CachedTranslator(OfflineTranslator())
+
+
+# Language detection only needs a sample, and langdetect's cost grows with the text
+LANGUAGE_SAMPLE_SIZE = 2_000
+LANGUAGE_CACHE_SIZE = 1_024
+
+_language_cache: 'OrderedDict[bytes, str]' = OrderedDict()
+_language_detector_factory = None
+
+
+def detect_language(text: str, sample_size: int = LANGUAGE_SAMPLE_SIZE) -> str:
+    """
+    Detects the language of ``text`` from its first ``sample_size`` characters.
+
+    Results are deterministic (langdetect is seeded) and cached by a hash of
+    the sample. Returns "en" if the language can't be detected.
+    """
+    global _language_detector_factory
+
+    sample = text[:sample_size]
+    key = hashlib.blake2b(sample.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    if key in _language_cache:
+        _language_cache.move_to_end(key)
+        return _language_cache[key]
+
+    if _language_detector_factory is None:
+        from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+
+        # A private factory, so seeding it doesn't touch langdetect's global one
+        factory = DetectorFactory()
+        factory.load_profile(PROFILES_DIRECTORY)
+        factory.seed = 0
+        _language_detector_factory = factory
+
+    try:
+        detector = _language_detector_factory.create()
+        detector.append(sample)
+        lang = detector.detect()
+    except:
+        lang = "en"
+
+    _language_cache[key] = lang
+    if len(_language_cache) > LANGUAGE_CACHE_SIZE:
+        _language_cache.popitem(last=False)
+    return lang
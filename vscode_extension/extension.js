@@ -1,49 +1,123 @@
 const vscode = require('vscode');
 const cp = require('child_process');
 const path = require('path');
+const readline = require('readline');
 
-function runPython(text, mode) {
-  const py = process.platform === 'win32' ? 'python' : 'python3';
-  const script = path.join(__dirname, 'python', 'anon.py');
-  const res = cp.spawnSync(py, [script, mode], {
-    input: text,
-    encoding: 'utf-8'
-  });
-  return res.stdout || text;
+// One long-running `anon.py serve` process answering line-delimited JSON
+// requests, so interpreter startup, pattern compilation and loading the
+// mapping store happen once rather than on every command.
+class AnonWorker {
+  constructor() {
+    this.proc = null;
+    this.nextId = 1;
+    this.pending = new Map();
+    this.disposed = false;
+  }
+
+  start() {
+    const py = process.platform === 'win32' ? 'python' : 'python3';
+    const script = path.join(__dirname, 'python', 'anon.py');
+    const proc = cp.spawn(py, [script, 'serve'], { stdio: ['pipe', 'pipe', 'inherit'] });
+    const startedAt = Date.now();
+    this.proc = proc;
+    // A write to a worker that just died; its exit handler rejects the call
+    proc.stdin.on('error', () => {});
+
+    readline.createInterface({ input: proc.stdout }).on('line', line => {
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (err) {
+        return;
+      }
+      const call = this.pending.get(response.id);
+      if (!call) return;
+      this.pending.delete(response.id);
+      if (response.error) call.reject(new Error(response.error.message));
+      else call.resolve(response.result);
+    });
+
+    const onExit = (reason) => {
+      if (this.proc !== proc) return;
+      this.proc = null;
+      for (const call of this.pending.values()) call.reject(new Error(`anon.py worker ${reason}`));
+      this.pending.clear();
+      // Restart right away unless it dies on startup; then wait for the next command
+      if (!this.disposed && Date.now() - startedAt > 5000) this.start();
+    };
+    proc.on('exit', code => onExit(`exited with code ${code}`));
+    proc.on('error', err => onExit(`failed: ${err.message}`));
+  }
+
+  call(method, params = {}) {
+    if (!this.proc) this.start();
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.proc.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+  }
+
+  dispose() {
+    this.disposed = true;
+    if (this.proc) this.proc.kill();
+  }
+}
+
+const worker = new AnonWorker();
+
+async function runPython(text, mode) {
+  try {
+    return await worker.call(mode, { text });
+  } catch (err) {
+    vscode.window.showErrorMessage(`Anonimizacja: ${err.message}`);
+    return null;
+  }
+}
+
+// Runs `mode` on the text of `range` and replaces it with the result, unless
+// the document was edited while the worker ran: the range would no longer
+// hold the text that was processed, and typing would be overwritten
+async function processRange(e, range, mode) {
+  const version = e.document.version;
+  const result = await runPython(e.document.getText(range), mode);
+  if (result === null) return false;
+  if (e.document.version !== version) {
+    vscode.window.showWarningMessage('Anonimizacja: the document changed while it was processed, run the command again');
+    return false;
+  }
+  // Rejected by VS Code too if an edit slips in before this one is applied
+  return e.edit(b => b.replace(range, result));
 }
 
 exports.activate = (context) => {
+  worker.start();
+  context.subscriptions.push(worker);
+
   function setHistoryFlag() {
     vscode.commands.executeCommand('setContext','anonimizacja.hasHistory',true);
   }
 
   context.subscriptions.push(
-    vscode.commands.registerCommand('anonimizacja.runFile', () => {
+    vscode.commands.registerCommand('anonimizacja.runFile', async () => {
       const e = vscode.window.activeTextEditor;
       if (!e) return;
-      const t = e.document.getText();
-      e.edit(b => b.replace(
-        new vscode.Range(e.document.positionAt(0), e.document.positionAt(t.length)),
-        runPython(t,'anon')
-      ));
-      setHistoryFlag();
+      const whole = new vscode.Range(e.document.positionAt(0), e.document.positionAt(e.document.getText().length));
+      if (await processRange(e, whole, 'anon')) setHistoryFlag();
     }),
 
-    vscode.commands.registerCommand('anonimizacja.runSelection', () => {
+    vscode.commands.registerCommand('anonimizacja.runSelection', async () => {
       const e = vscode.window.activeTextEditor;
       if (!e || e.selection.isEmpty) return;
-      e.edit(b => b.replace(e.selection,
-        runPython(e.document.getText(e.selection),'anon')
-      ));
-      setHistoryFlag();
+      if (await processRange(e, e.selection, 'anon')) setHistoryFlag();
     }),
 
-    vscode.commands.registerCommand('anonimizacja.reverseSelection', () => {
+    vscode.commands.registerCommand('anonimizacja.reverseSelection', async () => {
       const e = vscode.window.activeTextEditor;
       if (!e || e.selection.isEmpty) return;
-      e.edit(b => b.replace(e.selection,
-        runPython(e.document.getText(e.selection),'reverse')
-      ));
+      await processRange(e, e.selection, 'reverse');
     })
   );
-};
\ No newline at end of file
+};
+
+exports.deactivate = () => worker.dispose();
@@ -1,10 +1,15 @@
 import re
 import sys
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple, Optional, TextIO, Tuple
 import json
 import os
+import time
+import sqlite3
 import tempfile
+from contextlib import contextmanager
 
+STORE_FILE = os.path.join(tempfile.gettempdir(), "anonimizacja_cache.sqlite3")
+# Written by earlier versions; imported once into a new STORE_FILE
 CACHE_FILE = os.path.join(tempfile.gettempdir(), "anonimizacja_cache.json")
 
 # =========================
@@ -14,14 +19,130 @@ CACHE_FILE = os.path.join(tempfile.gettempdir(), "anonimizacja_cache.json")
 PlaceholdersCache = Dict[str, Dict[str, Dict[str, str]]]
 
 PLACEHOLDER_RE = re.compile(r"\[[A-Z_]+_\d+\]")
+PLACEHOLDER_PARTS_RE = re.compile(r"\[([A-Z_]+)_(\d+)\]")
+
+
+class Span(NamedTuple):
+    start: int
+    end: int
+    original: str
+    entity_type: str
+    placeholder: str
+    output_start: int
+    output_end: int
+
+# =========================
+# Mapping store
+# =========================
+
+class SqliteMappingStore:
+    """
+    Placeholders kept in SQLite across runs. Each call writes only the
+    entries it created and lookups go through indexes, so neither depends
+    on how many placeholders the workspace already has.
+
+    Several processes (one worker per VS Code window) may share the file:
+    placeholders are numbered inside the write transaction that stores them.
+    """
+
+    def __init__(self, path: str = STORE_FILE, legacy_file: Optional[str] = CACHE_FILE):
+        is_new = not os.path.exists(path)
+        # Transactions are opened explicitly, see _write()
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS mapping (
+                placeholder TEXT PRIMARY KEY,
+                entity_type TEXT NOT NULL,
+                number INTEGER NOT NULL,
+                original TEXT NOT NULL,
+                UNIQUE (entity_type, original)
+            );
+            CREATE INDEX IF NOT EXISTS mapping_numbers ON mapping (entity_type, number);
+        """)
+        if is_new and legacy_file and os.path.exists(legacy_file):
+            self._import_json(legacy_file)
+
+    def _import_json(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                mapping = json.load(f)
+        except (OSError, ValueError):
+            return
+        entries = []
+        for placeholder, original in mapping.items():
+            match = PLACEHOLDER_PARTS_RE.fullmatch(placeholder)
+            if match:
+                entries.append((placeholder, match.group(1), int(match.group(2)), original))
+        self.add(entries)
+
+    def counts(self) -> Dict[str, int]:
+        """Highest placeholder number used per entity type"""
+        return dict(self.db.execute("SELECT entity_type, MAX(number) FROM mapping GROUP BY entity_type"))
+
+    def placeholder(self, entity_type: str, original: str) -> Optional[str]:
+        row = self.db.execute(
+            "SELECT placeholder FROM mapping WHERE entity_type = ? AND original = ?", (entity_type, original)
+        ).fetchone()
+        return row[0] if row else None
+
+    def original(self, placeholder: str) -> Optional[str]:
+        row = self.db.execute("SELECT original FROM mapping WHERE placeholder = ?", (placeholder,)).fetchone()
+        return row[0] if row else None
+
+    @contextmanager
+    def _write(self):
+        """A transaction holding the write lock from the start, so reads inside it stay current"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def add(self, entries: List[Tuple[str, str, int, str]]):
+        """Appends (placeholder, entity_type, number, original) rows in one transaction"""
+        if entries:
+            with self._write():
+                self.db.executemany("INSERT OR IGNORE INTO mapping VALUES (?, ?, ?, ?)", entries)
+
+    def assign(self, values: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """
+        Placeholders for (entity_type, original) pairs, numbering the ones not
+        stored yet after the highest number in the file. A value another
+        process stored first keeps that process's placeholder.
+        """
+        assigned = {}
+        if not values:
+            return assigned
+        with self._write():
+            for entity_type, original in values:
+                placeholder = self.placeholder(entity_type, original)
+                if placeholder is None:
+                    number = self.db.execute(
+                        "SELECT COALESCE(MAX(number), 0) + 1 FROM mapping WHERE entity_type = ?", (entity_type,)
+                    ).fetchone()[0]
+                    placeholder = f"[{entity_type}_{number}]"
+                    self.db.execute("INSERT INTO mapping VALUES (?, ?, ?, ?)",
+                                    (placeholder, entity_type, number, original))
+                assigned[(entity_type, original)] = placeholder
+        return assigned
+
+    def close(self):
+        self.db.close()
+
 
 # =========================
 # Anonymizer
 # =========================
 
 class PromptShieldRegex:
-    def __init__(self):
+    def __init__(self, store: Optional[SqliteMappingStore] = None):
         self.placeholders_cache: PlaceholdersCache = {}
+        # placeholder -> original, kept in step with placeholders_cache
+        self._restore_index: Dict[str, str] = {}
+        # Numbers and keeps placeholders when given; otherwise they are counted here
+        self.store = store
 
         self.rules = {
             "EMAIL": [
@@ -49,22 +170,30 @@ class PromptShieldRegex:
             ],
         }
 
-    def _get_placeholder(self, value: str, entity_type: str) -> str:
-        if entity_type not in self.placeholders_cache:
-            self.placeholders_cache[entity_type] = {
-                "placeholders": {},
-                "count": 0
-            }
-
-        cache = self.placeholders_cache[entity_type]
-
-        if value not in cache["placeholders"]:
-            cache["count"] += 1
-            cache["placeholders"][value] = f"[{entity_type}_{cache['count']}]"
-
-        return cache["placeholders"][value]
+    def _assign(self, found: List[Tuple[str, str]]):
+        """Gives every (entity_type, value) pair in ``found`` a placeholder, in one store transaction"""
+        new = {}
+        for entity_type, value in found:
+            cache = self.placeholders_cache.setdefault(entity_type, {"placeholders": {}, "count": 0})
+            if value not in cache["placeholders"]:
+                new[(entity_type, value)] = None
+
+        if self.store is not None:
+            new = self.store.assign(list(new))
+        else:
+            for entity_type, value in new:
+                cache = self.placeholders_cache[entity_type]
+                cache["count"] += 1
+                new[(entity_type, value)] = f"[{entity_type}_{cache['count']}]"
+
+        for (entity_type, value), placeholder in new.items():
+            self.placeholders_cache[entity_type]["placeholders"][value] = placeholder
+            self._restore_index[placeholder] = value
 
     def protect(self, text: str) -> str:
+        return self.protect_spans(text)[0]
+
+    def protect_spans(self, text: str) -> Tuple[str, List[Span]]:
         matches: List[Tuple[int, int, str, str]] = []
 
         for entity_type, patterns in self.rules.items():
@@ -83,17 +212,31 @@ class PromptShieldRegex:
                 filtered.append((start, end, value, etype))
                 last_end = end
 
-        for _, _, value, etype in filtered:
-            self._get_placeholder(value, etype)
+        self._assign([(etype, value) for _, _, value, etype in filtered])
+
+        # Build the output in one pass instead of re-slicing per replacement
+        parts: List[str] = []
+        spans: List[Span] = []
+        last = 0
+        out_pos = 0
 
-        for start, end, value, etype in sorted(filtered, reverse=True):
-            text = text[:start] + self._get_placeholder(value, etype) + text[end:]
+        for start, end, value, etype in filtered:
+            placeholder = self.placeholders_cache[etype]["placeholders"][value]
+            parts.append(text[last:start])
+            out_pos += start - last
+            parts.append(placeholder)
+            spans.append(Span(start, end, value, etype, placeholder, out_pos, out_pos + len(placeholder)))
+            out_pos += len(placeholder)
+            last = end
 
-        return text
+        parts.append(text[last:])
+        return "".join(parts), spans
 
     def restore_placeholder(self, placeholder: str) -> str:
-        mapping = self.get_mapping()
-        return mapping.get(placeholder, placeholder)
+        original = self._restore_index.get(placeholder)
+        if original is None and self.store is not None:
+            original = self.store.original(placeholder)
+        return placeholder if original is None else original
 
     def get_mapping(self) -> Dict[str, str]:
         mapping = {}
@@ -107,25 +250,96 @@ class PromptShieldRegex:
 # Global instance
 # =========================
 
-_shield = PromptShieldRegex()
+_shield: Optional[PromptShieldRegex] = None
 
-def anonimizacja(text: str) -> str:
-    result = _shield.protect(text)
 
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(_shield.get_mapping(), f, ensure_ascii=False)
+def get_shield() -> PromptShieldRegex:
+    """The shared anonymizer, with the placeholders of earlier runs reloaded from STORE_FILE"""
+    global _shield
+    if _shield is None:
+        _shield = PromptShieldRegex(SqliteMappingStore())
+    return _shield
 
-    return result
+
+def anonimizacja(text: str) -> str:
+    return get_shield().protect(text)
 
 
 def cofanie_anonimizacji(selection: str) -> str:
-    if not os.path.exists(CACHE_FILE):
-        return selection
+    placeholder = selection.strip()
+    original = get_shield().restore_placeholder(placeholder)
+    return selection if original == placeholder else original
 
-    with open(CACHE_FILE, "r", encoding="utf-8") as f:
-        mapping = json.load(f)
+# =========================
+# Worker mode (JSON-RPC over stdin/stdout)
+# =========================
+
+class Worker:
+    """
+    Answers one JSON request per line with one JSON response per line:
+
+        {"id": 1, "method": "anon", "params": {"text": "..."}}
+        {"id": 1, "result": "..."}
+
+    Methods: anon(text), reverse(text), batch(texts, mode="anon") and
+    stats(). Errors come back as {"id": ..., "error": {"message": ...}}.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def anon(self, text: str) -> str:
+        return anonimizacja(text)
+
+    def reverse(self, text: str) -> str:
+        return cofanie_anonimizacji(text)
+
+    def batch(self, texts: List[str], mode: str = "anon") -> List[str]:
+        if mode not in ("anon", "reverse"):
+            raise ValueError(f"Unknown batch mode {mode!r}")
+        method = self.anon if mode == "anon" else self.reverse
+        return [method(text) for text in texts]
+
+    def stats(self) -> Dict[str, object]:
+        shield = get_shield()
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 6),
+            "placeholders": shield.store.counts(),
+            "store": STORE_FILE,
+        }
+
+    METHODS = ("anon", "reverse", "batch", "stats")
+
+    def handle(self, line: str) -> Dict[str, object]:
+        request_id = None
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            method = request.get("method")
+            if method not in self.METHODS:
+                raise ValueError(f"Unknown method {method!r}")
+            return {"id": request_id, "result": getattr(self, method)(**request.get("params", {}))}
+        except Exception as e:
+            self.errors += 1
+            return {"id": request_id, "error": {"message": f"{type(e).__name__}: {e}"}}
+        finally:
+            self.requests += 1
+            self.busy_seconds += time.perf_counter() - start
+
+    def serve(self, stdin: TextIO, stdout: TextIO):
+        for line in stdin:
+            if line.strip():
+                stdout.write(json.dumps(self.handle(line), ensure_ascii=False) + "\n")
+                stdout.flush()
 
-    return mapping.get(selection.strip(), selection)
 
 # =========================
 # CLI ENTRYPOINT (CRITICAL)
@@ -133,6 +347,15 @@ def cofanie_anonimizacji(selection: str) -> str:
 
 if __name__ == "__main__":
     mode = sys.argv[1] if len(sys.argv) > 1 else "anon"
+
+    if mode == "serve":
+        # Warm up once: store, counters and the compiled patterns
+        get_shield().protect("")
+        sys.stdin.reconfigure(encoding="utf-8")
+        sys.stdout.reconfigure(encoding="utf-8")
+        Worker().serve(sys.stdin, sys.stdout)
+        sys.exit(0)
+
     input_text = sys.stdin.read()
 
     if mode == "anon":